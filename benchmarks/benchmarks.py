@@ -0,0 +1,367 @@
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+
+from src.clients.clients import ApiClient, SocketClient, TokenManager
+from src.model.models import Measurement, WindDirection, WindMeasurement
+from src.sensors.anemometer import Anemometer
+from src.sensors.hardware import Hardware, close_hardware, set_hardware
+from src.services.aggregators import Aggregator, RollingPercentile, RunningStatistics, VectorAverage
+from src.services.services import Service
+from src.simulator.harness import StandInServers
+
+# Measures the sampling and delivery pipeline and stores the results as JSON, so releases can be compared:
+#   python -m benchmarks.benchmarks
+#   BENCHMARK_BASELINE=data/benchmarks/<previous>.json python -m benchmarks.benchmarks
+
+_SECONDS_PER_BENCHMARK: float = float(os.environ.get("BENCHMARK_SECONDS", "2"))
+_OUTPUT_DIRECTORY: str = os.environ.get("BENCHMARK_OUTPUT_PATH", "data/benchmarks")
+_BASELINE_PATH: Optional[str] = os.environ.get("BENCHMARK_BASELINE") or None
+_WINDOW_SIZES: List[int] = [10, 100, 1_000, 10_000]
+_GPIO_EDGES: int = 100_000
+_DELIVERIES: int = 200
+_DELIVERY_BATCH_SIZE: int = 50
+_API_URL: str = "http://127.0.0.1:18085"
+_SOCKET_URL: str = "http://127.0.0.1:18086"
+
+
+def _get_wind_measurement() -> Measurement:
+    return WindMeasurement(
+        speed=42,
+        direction=WindDirection.S_SW.value,
+        bearing=202.5,
+        direction_confidence=0.87,
+        gust=71,
+        gust_date_time=datetime.now(tz=timezone.utc),
+        average_speed_2_minutes=40,
+        average_speed_10_minutes=38,
+        date_time=datetime.now(tz=timezone.utc),
+        statistics={"speed": {"min": 12.0, "max": 71.0, "stddev": 9.43, "p90": 58.0}, "bearing": {"stddev": 12.1}},
+    )
+
+
+class _WindLikeService(Service):
+    # Readings are prepared beforehand and the aggregators are the ones of the wind service, the heaviest of them
+    __slots__ = ["__readings", "__index"]
+
+    def __init__(self) -> None:
+        self.__readings: List[Measurement] = [
+            WindMeasurement(speed=index % 90, bearing=(index * 22.5) % 360, direction_confidence=0.5 + index % 50 / 100) for index in range(1_000)
+        ]
+        self.__index = 0
+        super().__init__(seconds_between_readings=None)
+
+    async def get_reading(self) -> Measurement:
+        self.__index = (self.__index + 1) % len(self.__readings)
+        return self.__readings[self.__index]
+
+    def add_reading(self, reading: Measurement) -> None:
+        self._add_reading(reading=reading)
+
+    def _create_aggregators(self) -> dict[str, Aggregator]:
+        return {
+            "speed": RunningStatistics(field="speed"),
+            "speed_percentile": RollingPercentile(field="speed", percentile=90, window_size=1024),
+            "bearing": VectorAverage(field="bearing", weight_field="speed"),
+            "direction_confidence": RunningStatistics(field="direction_confidence"),
+        }
+
+    async def _get_measurement_average(self, aggregators: dict[str, Aggregator]) -> Measurement:
+        speed: RunningStatistics = aggregators["speed"]
+        speed_percentile: RollingPercentile = aggregators["speed_percentile"]
+        bearing: VectorAverage = aggregators["bearing"]
+
+        return WindMeasurement(
+            speed=int(speed.mean or 0),
+            bearing=bearing.mean,
+            date_time=datetime.now(tz=timezone.utc),
+            statistics={"speed": {**speed.summary(), "p90": speed_percentile.value}},
+        )
+
+
+class _BenchmarkButton(object):
+    __slots__ = ["when_pressed"]
+
+    def __init__(self) -> None:
+        self.when_pressed: Optional[Callable[[], None]] = None
+
+    def close(self) -> None:
+        pass
+
+
+class _BenchmarkHardware(Hardware):
+    __slots__ = ["__buttons"]
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.__buttons: List[_BenchmarkButton] = []
+
+    @property
+    def buttons(self) -> List[_BenchmarkButton]:
+        return self.__buttons
+
+    def create_button(self, pin: int, bounce_time: Optional[float]) -> _BenchmarkButton:
+        button: _BenchmarkButton = self._add_device(device=_BenchmarkButton())
+        self.__buttons.append(button)
+
+        return button
+
+
+async def _run_repeatedly(operation: Callable[[], Awaitable[None]]) -> float:
+    # Operations per second during the benchmark time
+    operations: int = 0
+    started_at: float = time.perf_counter()
+
+    while time.perf_counter() - started_at < _SECONDS_PER_BENCHMARK:
+        for _ in range(100):
+            await operation()
+
+        operations += 100
+
+    return operations / (time.perf_counter() - started_at)
+
+
+def _summarise_latencies(latencies: List[float]) -> dict[str, float]:
+    percentiles: List[float] = statistics.quantiles(data=latencies, n=100)
+    return {"p50_ms": percentiles[49] * 1000, "p95_ms": percentiles[94] * 1000, "max_ms": max(latencies) * 1000}
+
+
+async def benchmark_sample_ingestion() -> dict[str, float]:
+    service: _WindLikeService = _WindLikeService()
+    return {"samples_per_second": await _run_repeatedly(operation=service.sample)}
+
+
+async def benchmark_aggregation() -> dict[str, float]:
+    service: _WindLikeService = _WindLikeService()
+    reading: Measurement = await service.get_reading()
+    results: dict[str, float] = {}
+
+    for window_size in _WINDOW_SIZES:
+        durations: List[float] = []
+
+        for _ in range(5):
+            for _ in range(window_size):
+                service.add_reading(reading=reading)
+
+            started_at: float = time.perf_counter()
+            await service.get_measurements()
+            durations.append(time.perf_counter() - started_at)
+
+        results[f"window_{window_size}_ms"] = statistics.median(durations) * 1000
+
+    return results
+
+
+async def benchmark_serialisation() -> dict[str, float]:
+    measurement: Measurement = _get_wind_measurement()
+
+    async def to_dict() -> None:
+        measurement.to_dict()
+
+    async def to_json() -> None:
+        json.dumps(obj=measurement.to_dict())
+
+    async def to_msgpack() -> None:
+        measurement.to_msgpack()
+
+    return {
+        "to_dict_per_second": await _run_repeatedly(operation=to_dict),
+        "to_json_per_second": await _run_repeatedly(operation=to_json),
+        "to_msgpack_per_second": await _run_repeatedly(operation=to_msgpack),
+    }
+
+
+async def benchmark_gpio_callbacks() -> dict[str, float]:
+    # The edges are fired from another thread as gpiozero does and go through the interrupt bridge and the gust engine
+    hardware: _BenchmarkHardware = _BenchmarkHardware()
+    set_hardware(hardware=hardware)
+    anemometer: Anemometer = Anemometer(port_number=0)
+    when_pressed: Callable[[], None] = hardware.buttons[0].when_pressed
+
+    def fire_edges() -> None:
+        for _ in range(_GPIO_EDGES):
+            when_pressed()
+
+    started_at: float = time.perf_counter()
+    thread: threading.Thread = threading.Thread(target=fire_edges)
+    thread.start()
+
+    while thread.is_alive():
+        await asyncio.sleep(0.001)
+
+    # The last burst is dispatched in the next iteration of the loop
+    await asyncio.sleep(0)
+    elapsed_seconds: float = time.perf_counter() - started_at
+    anemometer.get_speed()
+    close_hardware()
+
+    return {"edges_per_second": _GPIO_EDGES / elapsed_seconds, "overhead_per_edge_us": elapsed_seconds / _GPIO_EDGES * 1_000_000}
+
+
+async def benchmark_api_delivery() -> dict[str, float]:
+    token_manager: TokenManager = TokenManager(auth_url=f"{_API_URL}/auth", user="benchmark", password="benchmark")
+    api_client: ApiClient = ApiClient(token_manager=token_manager)
+    bulk_api_client: ApiClient = ApiClient(token_manager=token_manager, bulk_end_point=f"{_API_URL}/measurements/bulk")
+    tuple_endpoint_payload: tuple[str, dict] = (f"{_API_URL}/measurements/wind-measurement", _get_wind_measurement().to_dict())
+
+    try:
+        latencies: List[float] = []
+        for _ in range(_DELIVERIES):
+            started_at: float = time.perf_counter()
+            await api_client.add_measurements(tuples_endpoint_payload=[tuple_endpoint_payload])
+            latencies.append(time.perf_counter() - started_at)
+
+        started_at: float = time.perf_counter()
+        for _ in range(_DELIVERIES // _DELIVERY_BATCH_SIZE):
+            await api_client.add_measurements(tuples_endpoint_payload=[tuple_endpoint_payload] * _DELIVERY_BATCH_SIZE)
+        concurrent_seconds: float = time.perf_counter() - started_at
+
+        started_at: float = time.perf_counter()
+        for _ in range(_DELIVERIES // _DELIVERY_BATCH_SIZE):
+            await bulk_api_client.add_measurements(tuples_endpoint_payload=[tuple_endpoint_payload] * _DELIVERY_BATCH_SIZE)
+        bulk_seconds: float = time.perf_counter() - started_at
+
+        return {
+            **_summarise_latencies(latencies=latencies),
+            "concurrent_measurements_per_second": _DELIVERIES / concurrent_seconds,
+            "bulk_measurements_per_second": _DELIVERIES / bulk_seconds,
+        }
+    finally:
+        await asyncio.gather(api_client.close(), bulk_api_client.close())
+        await token_manager.close()
+
+
+async def benchmark_socket_delivery() -> dict[str, float]:
+    token_manager: TokenManager = TokenManager(auth_url=f"{_API_URL}/auth", user="benchmark", password="benchmark")
+    socket_client: SocketClient = SocketClient(socket_url=_SOCKET_URL, token_manager=token_manager)
+    tuple_event_measurement: tuple[str, Measurement] = ("emitWindMeasurement", _get_wind_measurement())
+
+    try:
+        latencies: List[float] = []
+        for _ in range(_DELIVERIES):
+            started_at: float = time.perf_counter()
+            await socket_client.emit_measurements(tuples_event_measurement=[tuple_event_measurement])
+            latencies.append(time.perf_counter() - started_at)
+
+        started_at: float = time.perf_counter()
+        for _ in range(_DELIVERIES // _DELIVERY_BATCH_SIZE):
+            await socket_client.emit_measurements(tuples_event_measurement=[tuple_event_measurement] * _DELIVERY_BATCH_SIZE)
+        concurrent_seconds: float = time.perf_counter() - started_at
+
+        return {**_summarise_latencies(latencies=latencies), "concurrent_measurements_per_second": _DELIVERIES / concurrent_seconds}
+    finally:
+        await socket_client.close()
+        await token_manager.close()
+
+
+async def benchmark_binary_socket_delivery() -> dict[str, float]:
+    # MessagePack payloads in batched emissions without waiting for every acknowledgement
+    token_manager: TokenManager = TokenManager(auth_url=f"{_API_URL}/auth", user="benchmark", password="benchmark")
+    socket_client: SocketClient = SocketClient(
+        socket_url=_SOCKET_URL,
+        token_manager=token_manager,
+        binary_payloads=True,
+        batch_emits=True,
+        acknowledgement_window=32,
+    )
+    tuple_event_measurement: tuple[str, Measurement] = ("emitWindMeasurement", _get_wind_measurement())
+
+    try:
+        started_at: float = time.perf_counter()
+        for _ in range(_DELIVERIES):
+            await socket_client.emit_measurements(tuples_event_measurement=[tuple_event_measurement])
+        streamed_seconds: float = time.perf_counter() - started_at
+
+        started_at: float = time.perf_counter()
+        for _ in range(_DELIVERIES // _DELIVERY_BATCH_SIZE):
+            await socket_client.emit_measurements(tuples_event_measurement=[tuple_event_measurement] * _DELIVERY_BATCH_SIZE)
+        batched_seconds: float = time.perf_counter() - started_at
+    finally:
+        # Waits for the acknowledgements still in the window
+        started_at: float = time.perf_counter()
+        await socket_client.close()
+        closing_seconds: float = time.perf_counter() - started_at
+        await token_manager.close()
+
+    return {
+        "streamed_measurements_per_second": _DELIVERIES / streamed_seconds,
+        "batched_measurements_per_second": _DELIVERIES / batched_seconds,
+        "pending_acknowledgements_ms": closing_seconds * 1000,
+    }
+
+
+def _get_revision() -> Optional[str]:
+    try:
+        return subprocess.run(args=["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_results(results: dict[str, dict[str, float]], baseline: Optional[dict[str, dict[str, float]]]) -> None:
+    for benchmark, values in results.items():
+        print(benchmark)
+
+        for name, value in values.items():
+            baseline_value: Optional[float] = (baseline or {}).get(benchmark, {}).get(name)
+            change: str = f" ({(value - baseline_value) / baseline_value:+.1%})" if baseline_value else ""
+            print(f"  {name:<40} {value:>14.3f}{change}")
+
+
+async def run() -> None:
+    stand_in_servers: StandInServers = StandInServers(api_url=_API_URL, socket_url=_SOCKET_URL)
+    await stand_in_servers.start()
+    results: dict[str, dict[str, float]] = {}
+    benchmarks: List[Callable[[], Awaitable[dict[str, float]]]] = [
+        benchmark_sample_ingestion,
+        benchmark_aggregation,
+        benchmark_serialisation,
+        benchmark_gpio_callbacks,
+        benchmark_api_delivery,
+        benchmark_socket_delivery,
+        benchmark_binary_socket_delivery,
+    ]
+
+    try:
+        for benchmark in benchmarks:
+            results[benchmark.__name__.removeprefix("benchmark_")] = await benchmark()
+    finally:
+        await stand_in_servers.close()
+
+    baseline: Optional[dict[str, dict[str, float]]] = None
+    if _BASELINE_PATH is not None:
+        with open(file=_BASELINE_PATH) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    _print_results(results=results, baseline=baseline)
+
+    started_at: datetime = datetime.now(tz=timezone.utc)
+    os.makedirs(name=_OUTPUT_DIRECTORY, exist_ok=True)
+    output_path: str = os.path.join(_OUTPUT_DIRECTORY, f"{started_at.strftime('%Y%m%dT%H%M%SZ')}.json")
+
+    with open(file=output_path, mode="w") as output_file:
+        json.dump(
+            obj={
+                "date_time": started_at.isoformat(),
+                "revision": _get_revision(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "seconds_per_benchmark": _SECONDS_PER_BENCHMARK,
+                "results": results,
+            },
+            fp=output_file,
+            indent=2,
+        )
+
+    print(f"Results stored in {output_path}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,153 @@
+import struct
+from typing import List, Optional
+
+from src.sensors.bme280 import Bme280Calibration, Bme280Reading, compensate
+
+# Checks the BME280 driver against the references of Bosch, so a change in the compensation formulas is noticed:
+#   python -m benchmarks.bme280_compensation
+
+# Worked example of the BMP280 datasheet, section 3.12. The temperature and pressure formulas are the same in the BME280
+# It has no humidity, the humidity calibration is the one of a real chip and is checked against the fixed point reference
+_WORKED_EXAMPLE_CALIBRATION: Bme280Calibration = Bme280Calibration(
+    dig_t1=27504,
+    dig_t2=26435,
+    dig_t3=-1000,
+    dig_p1=36477,
+    dig_p2=-10685,
+    dig_p3=3024,
+    dig_p4=2855,
+    dig_p5=140,
+    dig_p6=-7,
+    dig_p7=15500,
+    dig_p8=-14600,
+    dig_p9=6000,
+    dig_h1=75,
+    dig_h2=362,
+    dig_h3=0,
+    dig_h4=313,
+    dig_h5=50,
+    dig_h6=30,
+)
+_WORKED_EXAMPLE_ADC_T: int = 519888
+_WORKED_EXAMPLE_ADC_P: int = 415148
+_WORKED_EXAMPLE_TEMPERATURE: float = 25.08
+_WORKED_EXAMPLE_PRESSURE: float = 1006.5327
+_HUMIDITY_ADC_VALUES: List[int] = [24000, 26000, 28000, 30000, 32000, 34000]
+_SKIPPED_HUMIDITY: int = 0x8000
+_TEMPERATURE_TOLERANCE: float = 0.005
+_PRESSURE_TOLERANCE: float = 0.0005
+# The fixed point reference has a resolution of 1/1024 %RH and takes the temperature with a resolution of 1/5120 ºC
+_HUMIDITY_TOLERANCE: float = 0.01
+
+
+def _to_raw_data(adc_p: int, adc_t: int, adc_h: int) -> bytes:
+    # Pressure and temperature are 20 bits values left aligned in three registers, humidity takes two
+    return bytes(
+        [
+            (adc_p >> 12) & 0xFF,
+            (adc_p >> 4) & 0xFF,
+            (adc_p << 4) & 0xF0,
+            (adc_t >> 12) & 0xFF,
+            (adc_t >> 4) & 0xFF,
+            (adc_t << 4) & 0xF0,
+            (adc_h >> 8) & 0xFF,
+            adc_h & 0xFF,
+        ]
+    )
+
+
+def _get_humidity_reference(adc_t: int, adc_h: int, calibration: Bme280Calibration) -> float:
+    # 32 bits fixed point formulas of the BME280 datasheet, section 4.2.3
+    var1: int = (((adc_t >> 3) - (calibration.dig_t1 << 1)) * calibration.dig_t2) >> 11
+    var2: int = (((((adc_t >> 4) - calibration.dig_t1) * ((adc_t >> 4) - calibration.dig_t1)) >> 12) * calibration.dig_t3) >> 14
+    t_fine: int = var1 + var2 - 76800
+
+    humidity: int = (((adc_h << 14) - (calibration.dig_h4 << 20) - (calibration.dig_h5 * t_fine)) + 16384) >> 15
+    humidity *= (
+        (((((t_fine * calibration.dig_h6) >> 10) * (((t_fine * calibration.dig_h3) >> 11) + 32768)) >> 10) + 2097152) * calibration.dig_h2 + 8192
+    ) >> 14
+    humidity -= ((((humidity >> 15) * (humidity >> 15)) >> 7) * calibration.dig_h1) >> 4
+    humidity = min(max(humidity, 0), 419430400)
+
+    # Q22.10 %RH
+    return (humidity >> 12) / 1024.0
+
+
+def _to_registers(calibration: Bme280Calibration) -> tuple[bytes, bytes]:
+    tp_block: bytes = struct.pack(
+        "<HhhHhhhhhhhhBB",
+        calibration.dig_t1,
+        calibration.dig_t2,
+        calibration.dig_t3,
+        calibration.dig_p1,
+        calibration.dig_p2,
+        calibration.dig_p3,
+        calibration.dig_p4,
+        calibration.dig_p5,
+        calibration.dig_p6,
+        calibration.dig_p7,
+        calibration.dig_p8,
+        calibration.dig_p9,
+        0,
+        calibration.dig_h1,
+    )
+    # H4 takes 0xE4 and the low nibble of 0xE5, H5 the high nibble of 0xE5 and 0xE6
+    h_block: bytes = struct.pack(
+        "<hBbBbb",
+        calibration.dig_h2,
+        calibration.dig_h3,
+        calibration.dig_h4 >> 4,
+        ((calibration.dig_h5 & 0x0F) << 4) | (calibration.dig_h4 & 0x0F),
+        calibration.dig_h5 >> 4,
+        calibration.dig_h6,
+    )
+
+    return tp_block, h_block
+
+
+def _check(name: str, value: Optional[float], expected: float, tolerance: float, errors: List[str]) -> None:
+    if value is None or abs(value - expected) > tolerance:
+        errors.append(f"{name} is {value}, {expected} ± {tolerance} expected")
+    else:
+        print(f"  {name:<40} {value:>14.4f} ok")
+
+
+def check() -> List[str]:
+    errors: List[str] = []
+
+    tp_block, h_block = _to_registers(calibration=_WORKED_EXAMPLE_CALIBRATION)
+    if Bme280Calibration.from_registers(tp_block=tp_block, h_block=h_block) != _WORKED_EXAMPLE_CALIBRATION:
+        errors.append("The calibration read from the registers does not match the one written to them")
+
+    reading: Bme280Reading = compensate(
+        raw_data=_to_raw_data(adc_p=_WORKED_EXAMPLE_ADC_P, adc_t=_WORKED_EXAMPLE_ADC_T, adc_h=_SKIPPED_HUMIDITY),
+        calibration=_WORKED_EXAMPLE_CALIBRATION,
+    )
+    _check(name="temperature", value=reading.temperature, expected=_WORKED_EXAMPLE_TEMPERATURE, tolerance=_TEMPERATURE_TOLERANCE, errors=errors)
+    _check(name="pressure", value=reading.pressure, expected=_WORKED_EXAMPLE_PRESSURE, tolerance=_PRESSURE_TOLERANCE, errors=errors)
+
+    if reading.humidity is not None:
+        errors.append(f"A skipped humidity is {reading.humidity}, None expected")
+
+    for adc_h in _HUMIDITY_ADC_VALUES:
+        reading = compensate(
+            raw_data=_to_raw_data(adc_p=_WORKED_EXAMPLE_ADC_P, adc_t=_WORKED_EXAMPLE_ADC_T, adc_h=adc_h), calibration=_WORKED_EXAMPLE_CALIBRATION
+        )
+        _check(
+            name=f"humidity of {adc_h}",
+            value=reading.humidity,
+            expected=_get_humidity_reference(adc_t=_WORKED_EXAMPLE_ADC_T, adc_h=adc_h, calibration=_WORKED_EXAMPLE_CALIBRATION),
+            tolerance=_HUMIDITY_TOLERANCE,
+            errors=errors,
+        )
+
+    return errors
+
+
+if __name__ == "__main__":
+    found_errors: List[str] = check()
+
+    for error in found_errors:
+        print(error)
+
+    exit(1 if found_errors else 0)
@@ -1,121 +1,553 @@
+import asyncio
+import base64
+import gzip
 import json
 import logging
+import os
+import time
 from abc import ABC
+from enum import Enum
 from http import HTTPStatus
-from typing import List
+from typing import List, Optional
 
 import aiohttp
+import msgpack
 import socketio
 from socketio import exceptions
-from tenacity import retry, stop_after_attempt, wait_random
+from tenacity import RetryCallState, retry, retry_if_exception, stop_after_attempt, wait_random
+from yarl import URL
 
+from src.metrics.metrics import PAYLOAD_SIZE_BUCKETS_BYTES, metrics_registry
 from src.model.models import Measurement
 
 NUMBER_OF_ATTEMPTS: int = 3
 WAITING_TIME_MIN: int = 1
 WAITING_TIME_MAX: int = 2
+MAX_CONNECTIONS: int = 8
+MAX_CONCURRENT_REQUESTS: int = 4
+KEEPALIVE_TIMEOUT_SECONDS: int = 60
+DNS_CACHE_SECONDS: int = 300
+RECONNECTION_DELAY_MAX: int = 30
+CONNECTION_TIMEOUT_SECONDS: int = 10
+ACKNOWLEDGEMENT_TIMEOUT_SECONDS: int = 10
+# Tokens are refreshed in the background once they expire within the refresh margin, and in the foreground within the expiry one
+TOKEN_REFRESH_MARGIN_SECONDS: int = 120
+TOKEN_EXPIRY_MARGIN_SECONDS: int = 10
+BULK_NOT_SUPPORTED_STATUSES: frozenset[int] = frozenset(
+    [HTTPStatus.NOT_FOUND, HTTPStatus.METHOD_NOT_ALLOWED, HTTPStatus.UNSUPPORTED_MEDIA_TYPE, HTTPStatus.NOT_IMPLEMENTED]
+)
+# Statuses of a measurement the API will never accept, any other failure is retried later
+REJECTED_STATUSES: frozenset[int] = frozenset([HTTPStatus.BAD_REQUEST, HTTPStatus.UNPROCESSABLE_ENTITY])
 
 
-class Client(ABC):
-    __slots__ = ["__auth_url", "__user", "__password", "_logger", "__token"]
+class DeliveryResult(Enum):
+    DELIVERED = "delivered"
+    FAILED = "failed"
+    REJECTED = "rejected"
 
-    def __init__(self, auth_url: str, user: str, password: str) -> None:
-        self._logger = logging.getLogger(name=self.__class__.__name__)
+
+class AuthenticationError(Exception):
+    # A token could not be obtained, it says nothing about the measurements waiting for it
+    pass
+
+
+def _is_retryable(exception: BaseException) -> bool:
+    return not isinstance(exception, aiohttp.ClientResponseError) or exception.status not in REJECTED_STATUSES
+
+
+def _count_retry(retry_state: RetryCallState) -> None:
+    metrics_registry.increment_counter(
+        name="wsp_client_retries_total", description="Requests retried by the clients", labels={"operation": retry_state.fn.__name__.strip("_")}
+    )
+
+
+def _observe_delivery(channel: str, started_at: float, payload_size: int) -> None:
+    metrics_registry.observe(
+        name="wsp_delivery_duration_seconds",
+        description="Time taken to deliver measurements, retries included",
+        value=time.perf_counter() - started_at,
+        labels={"channel": channel},
+    )
+    metrics_registry.observe(
+        name="wsp_delivery_payload_bytes",
+        description="Size of the payloads sent to deliver measurements",
+        value=payload_size,
+        labels={"channel": channel},
+        buckets=PAYLOAD_SIZE_BUCKETS_BYTES,
+    )
+
+
+def _get_token_expiry(token: str) -> Optional[float]:
+    # The expiry of a JWT is the exp claim of its payload, tokens that are not JWTs are used until they are rejected
+    try:
+        payload: str = token.split(".")[1]
+        claims: dict = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenManager(object):
+    __slots__ = ["__auth_url", "__user", "__password", "__path", "__token", "__expires_at", "__refresh", "__session", "__logger"]
+
+    def __init__(self, auth_url: str, user: str, password: str, path: Optional[str] = None) -> None:
+        self.__logger = logging.getLogger(name=self.__class__.__name__)
 
         self.__auth_url = auth_url
         self.__user = user
         self.__password = password
-        self.__token = ""
+        self.__path = path
+        self.__token: Optional[str] = None
+        self.__expires_at: Optional[float] = None
+        # Refresh in flight, every caller needing a token meanwhile waits for the same one
+        self.__refresh: Optional[asyncio.Task] = None
+        self.__session: Optional[aiohttp.ClientSession] = None
+
+        self.__logger.debug(msg=f"{self.__class__.__name__} initialized with user {self.__user} and url {self.__auth_url}")
+
+        if self.__path:
+            self.__load()
+
+    async def get_token(self) -> str:
+        now: float = time.time()
+
+        if self.__token and (self.__expires_at is None or now < self.__expires_at - TOKEN_REFRESH_MARGIN_SECONDS):
+            return self.__token
+
+        if self.__token and now < self.__expires_at - TOKEN_EXPIRY_MARGIN_SECONDS:
+            # About to expire, it is still used while the new one is requested in the background
+            self.__start_refresh(in_background=True)
+            return self.__token
+
+        self.__logger.debug(msg="Token not set or expired, requesting a new one")
+        return await asyncio.shield(self.__start_refresh(in_background=False))
+
+    def reset_token(self, token: str) -> None:
+        # Only the rejected token is discarded, another client may have obtained a new one meanwhile
+        if token == self.__token:
+            self.__logger.debug(msg="Token rejected, resetting token")
+            self.__token = None
+            self.__expires_at = None
+
+    async def close(self) -> None:
+        if self.__refresh is not None:
+            await asyncio.gather(self.__refresh, return_exceptions=True)
+
+        if self.__session is not None and not self.__session.closed:
+            await self.__session.close()
+
+    def __start_refresh(self, in_background: bool) -> asyncio.Task:
+        if self.__refresh is None or self.__refresh.done():
+            self.__refresh = asyncio.create_task(coro=self.__request_token())
+
+            # The callers waiting for a refresh get its errors, only the background ones need to be logged
+            if in_background:
+                self.__refresh.add_done_callback(self.__consume_refresh_error)
+
+        return self.__refresh
+
+    def __consume_refresh_error(self, task: asyncio.Task) -> None:
+        # Background refreshes have no caller waiting, their errors are logged and the next call tries again
+        if not task.cancelled() and task.exception() is not None:
+            self.__logger.warning(msg="Error requesting a token", exc_info=task.exception())
 
-        self._logger.debug(msg=f"{self.__class__.__name__} initialized with user {self.__user} and url {self.__auth_url}")
+    async def __request_token(self) -> str:
+        if self.__session is None or self.__session.closed:
+            self.__session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False))
 
-    async def _set_token(self) -> None:
-        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False)) as session:
-            async with session.post(
+        try:
+            async with self.__session.post(
                 url=self.__auth_url, json={"login": self.__user, "password": self.__password}, headers={"Content-Type": "application/json"}
             ) as response:
                 response.raise_for_status()
                 data = await response.json()
-                self.__token = data.get("access_token")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            raise AuthenticationError(f"A token could not be obtained from {self.__auth_url}: {e}") from e
+
+        token: Optional[str] = data.get("access_token") if isinstance(data, dict) else None
+        if not token:
+            raise AuthenticationError(f"The authentication response of {self.__auth_url} does not contain an access token")
+
+        self.__token = token
+        self.__expires_at = _get_token_expiry(token=token)
+
+        metrics_registry.increment_counter(name="wsp_token_refreshes_total", description="Tokens requested to the authentication endpoint")
+        self.__logger.debug(msg=f"Token obtained, it expires at {self.__expires_at}")
 
-    async def _get_token(self) -> str:
-        if not self.__token:
-            self._logger.debug("Token not set, setting token")
-            await self._set_token()
+        if self.__path:
+            await asyncio.to_thread(self.__save)
 
         return self.__token
 
-    def _reset_token(self) -> None:
-        self.__token = None
+    def __load(self) -> None:
+        try:
+            with open(file=self.__path) as token_file:
+                data: dict = json.load(token_file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.__logger.warning(msg=f"Token file {self.__path} could not be read", exc_info=e)
+            return
+
+        # A token of another user or server, or an expired one, is not reused
+        expires_at: Optional[float] = _get_token_expiry(token=data.get("token") or "")
+        if data.get("authUrl") != self.__auth_url or data.get("user") != self.__user or (expires_at is not None and expires_at <= time.time()):
+            return
+
+        self.__token = data["token"]
+        self.__expires_at = expires_at
+        self.__logger.debug(msg=f"Token loaded from {self.__path}")
+
+    def __save(self) -> None:
+        try:
+            os.makedirs(name=os.path.dirname(self.__path) or ".", exist_ok=True)
+            temporary_path: str = f"{self.__path}.tmp"
+
+            # Written aside and moved, a crash never leaves a half written token. Only the owner can read it
+            with open(file=os.open(path=temporary_path, flags=os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode=0o600), mode="w") as token_file:
+                json.dump(obj={"authUrl": self.__auth_url, "user": self.__user, "token": self.__token}, fp=token_file)
+
+            os.replace(src=temporary_path, dst=self.__path)
+        except OSError as e:
+            self.__logger.warning(msg=f"Token could not be saved in {self.__path}", exc_info=e)
+
+
+class Client(ABC):
+    __slots__ = ["_logger", "_token_manager", "__session"]
+
+    def __init__(self, token_manager: TokenManager) -> None:
+        self._logger = logging.getLogger(name=self.__class__.__name__)
+
+        self._token_manager = token_manager
+        self.__session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self.__session is None or self.__session.closed:
+            self.__session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    ssl=False, limit=MAX_CONNECTIONS, keepalive_timeout=KEEPALIVE_TIMEOUT_SECONDS, ttl_dns_cache=DNS_CACHE_SECONDS
+                )
+            )
+
+        return self.__session
+
+    async def close(self) -> None:
+        if self.__session is not None and not self.__session.closed:
+            await self.__session.close()
+            self._logger.debug(msg="HTTP session closed")
 
 
 class ApiClient(Client):
-    async def add_measurements(self, tuples_endpoint_measurement: List[tuple[str, Measurement]]) -> None:
+    __slots__ = ["__semaphore", "__bulk_end_point"]
+
+    def __init__(self, token_manager: TokenManager, bulk_end_point: Optional[str] = None) -> None:
+        super().__init__(token_manager=token_manager)
+
+        self.__semaphore = asyncio.Semaphore(value=MAX_CONCURRENT_REQUESTS)
+        self.__bulk_end_point = bulk_end_point
+
+    @property
+    def bulk_mode(self) -> bool:
+        return self.__bulk_end_point is not None
+
+    async def add_measurements(self, tuples_endpoint_payload: List[tuple[str, dict[str, int | str]]]) -> List[DeliveryResult]:
+        if self.bulk_mode:
+            result: Optional[DeliveryResult] = await self.__add_measurements_in_bulk(tuples_endpoint_payload=tuples_endpoint_payload)
+
+            if result is not None:
+                return [result] * len(tuples_endpoint_payload)
+
+        return await asyncio.gather(*(self.__add_measurement(end_point=end_point, payload=payload) for end_point, payload in tuples_endpoint_payload))
+
+    async def __add_measurements_in_bulk(self, tuples_endpoint_payload: List[tuple[str, dict[str, int | str]]]) -> Optional[DeliveryResult]:
+        body: bytes = gzip.compress(
+            data=json.dumps(
+                obj={"measurements": [{"endpoint": URL(end_point).path, "measurement": payload} for end_point, payload in tuples_endpoint_payload]}
+            ).encode()
+        )
+
+        started_at: float = time.perf_counter()
+
+        try:
+            if await self.__process_bulk_request(body=body):
+                self._logger.info(msg=f"{len(tuples_endpoint_payload)} measurements added in bulk ({len(body)} bytes) correctly")
+                return DeliveryResult.DELIVERED
+
+            self._logger.warning(msg=f"Bulk endpoint {self.__bulk_end_point} not supported by the server, falling back to one request per endpoint")
+            self.__bulk_end_point = None
+
+            return None
+        except AuthenticationError as e:
+            self._logger.error(msg=f"Error adding the measurements in bulk, {e}")
+        except aiohttp.ClientResponseError as e:
+            if not _is_retryable(exception=e):
+                # A single invalid measurement rejects the whole request, they are sent one by one to find the rejected ones
+                self._logger.warning(msg=f"Measurements rejected in bulk with the response ({e.status}) {e.message}, sending them one by one")
+                return None
+
+            self._logger.error(msg=f"Error adding the measurements in bulk with the response ({e.status}) {e.message}", exc_info=e)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._logger.error(msg=f"Error adding the measurements in bulk through the endpoint {self.__bulk_end_point}", exc_info=e)
+        finally:
+            _observe_delivery(channel="api_bulk", started_at=started_at, payload_size=len(body))
+
+        return DeliveryResult.FAILED
+
+    async def __add_measurement(self, end_point: str, payload: dict[str, int | str]) -> DeliveryResult:
+        body: bytes = json.dumps(obj=payload).encode()
+
         try:
-            async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False)) as session:
-                for end_point, measurement in tuples_endpoint_measurement:
-                    await self.__process_request(session=session, end_point=end_point, measurement=measurement)
+            async with self.__semaphore:
+                started_at: float = time.perf_counter()
+
+                try:
+                    await self.__process_request(end_point=end_point, body=body)
+                finally:
+                    _observe_delivery(channel="api", started_at=started_at, payload_size=len(body))
+
+            return DeliveryResult.DELIVERED
+        except AuthenticationError as e:
+            self._logger.error(msg=f"Error adding a measurement through the endpoint {end_point}, {e}")
         except aiohttp.ClientResponseError as e:
             self._logger.error(msg=f"Error adding a measurement with the response ({e.status}) {e.message}", exc_info=e)
 
-    @retry(reraise=True, stop=(stop_after_attempt(NUMBER_OF_ATTEMPTS)), wait=wait_random(min=WAITING_TIME_MIN, max=WAITING_TIME_MAX))
-    async def __process_request(self, session: aiohttp.ClientSession, end_point: str, measurement: Measurement) -> None:
-        token: str = await self._get_token()
+            if not _is_retryable(exception=e):
+                return DeliveryResult.REJECTED
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._logger.error(msg=f"Error adding a measurement through the endpoint {end_point}", exc_info=e)
+
+        return DeliveryResult.FAILED
+
+    @retry(
+        reraise=True,
+        stop=(stop_after_attempt(NUMBER_OF_ATTEMPTS)),
+        wait=wait_random(min=WAITING_TIME_MIN, max=WAITING_TIME_MAX),
+        retry=retry_if_exception(predicate=_is_retryable),
+        before_sleep=_count_retry,
+    )
+    async def __process_request(self, end_point: str, body: bytes) -> None:
+        token: str = await self._token_manager.get_token()
 
-        async with session.post(
-            url=end_point, json=measurement.to_dict(), headers={"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+        async with self._get_session().post(
+            url=end_point, data=body, headers={"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
         ) as response:
             if response.status == HTTPStatus.UNAUTHORIZED:
-                self._logger.debug("Token expired, resetting token")
-                self._reset_token()
+                self._token_manager.reset_token(token=token)
 
             response.raise_for_status()
             self._logger.info(msg=f"Measurement added through the endpoint {end_point} correctly")
 
+    @retry(
+        reraise=True,
+        stop=(stop_after_attempt(NUMBER_OF_ATTEMPTS)),
+        wait=wait_random(min=WAITING_TIME_MIN, max=WAITING_TIME_MAX),
+        retry=retry_if_exception(predicate=_is_retryable),
+        before_sleep=_count_retry,
+    )
+    async def __process_bulk_request(self, body: bytes) -> bool:
+        token: str = await self._token_manager.get_token()
+
+        async with self._get_session().post(
+            url=self.__bulk_end_point,
+            data=body,
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip", "Authorization": f"Bearer {token}"},
+        ) as response:
+            if response.status in BULK_NOT_SUPPORTED_STATUSES:
+                return False
+
+            if response.status == HTTPStatus.UNAUTHORIZED:
+                self._token_manager.reset_token(token=token)
+
+            response.raise_for_status()
+
+            return True
+
 
 class SocketClient(Client):
-    __slots__ = ["__socket_url", "__client"]
+    __slots__ = [
+        "__socket_url",
+        "__client",
+        "__connection_lock",
+        "__connection_token",
+        "__binary_payloads",
+        "__batch_emits",
+        "__acknowledgement_window",
+        "__pending_acknowledgements",
+    ]
 
-    def __init__(self, socket_url: str, auth_url: str, user: str, password: str) -> None:
-        super().__init__(auth_url=auth_url, user=user, password=password)
+    def __init__(
+        self,
+        socket_url: str,
+        token_manager: TokenManager,
+        binary_payloads: bool = False,
+        batch_emits: bool = False,
+        acknowledgement_window: int = 0,
+    ) -> None:
+        super().__init__(token_manager=token_manager)
 
         self.__socket_url = socket_url
-        self.__client = socketio.Client(ssl_verify=False)
+        self.__connection_lock = asyncio.Lock()
+        # Token the socket connected with, the one to discard when the server rejects it
+        self.__connection_token: Optional[str] = None
+        self.__binary_payloads = binary_payloads
+        self.__batch_emits = batch_emits
+        # Emissions allowed to wait for their acknowledgement at the same time, every emission waits for its own when 0
+        self.__acknowledgement_window: Optional[asyncio.Semaphore] = (
+            asyncio.Semaphore(value=acknowledgement_window) if acknowledgement_window > 0 else None
+        )
+        self.__pending_acknowledgements: set[asyncio.Task] = set()
+        self.__client = socketio.AsyncClient(
+            ssl_verify=False,
+            reconnection=True,
+            reconnection_delay=WAITING_TIME_MIN,
+            reconnection_delay_max=RECONNECTION_DELAY_MAX,
+        )
+        self.__client.on(event="connect", handler=self.__connection_handler)
+        self.__client.on(event="disconnect", handler=self.__disconnect_handler)
+        self.__client.on(event="exception", handler=self.__exception_handler)
 
-    @retry(reraise=True, stop=(stop_after_attempt(NUMBER_OF_ATTEMPTS)), wait=wait_random(min=WAITING_TIME_MIN, max=WAITING_TIME_MAX))
-    async def emit_measurements(self, tuples_event_measurement: List[tuple[str, Measurement]]) -> None:
-        @self.__client.on(event="connect")
-        def connection_handler() -> None:
-            self._logger.debug(msg=f"Socket connected to the server {self.__socket_url}")
-
-        @self.__client.on(event="disconnect")
-        def disconnect_handler(reason) -> None:
-            self._logger.debug(msg=f"Socket disconnected with reason '{reason}'")
-
-        @self.__client.on(event="exception")
-        def exception_handler(msg: str) -> None:
-            if "Invalid token" in msg:
-                self._logger.debug("Token expired, resetting token")
-                self._reset_token()
-            else:
-                self._logger.error(msg=f"Exception received from the server with message {msg}")
+    def __connection_handler(self) -> None:
+        self._logger.debug(msg=f"Socket connected to the server {self.__socket_url}")
 
-        try:
-            token: str = await self._get_token()
-            self.__client.connect(url=self.__socket_url, headers={"Authorization": f"Bearer {token}"}, transports=["websocket"])
+    def __disconnect_handler(self, reason) -> None:
+        self._logger.debug(msg=f"Socket disconnected with reason '{reason}'")
+
+    async def __exception_handler(self, msg: str) -> None:
+        if "Invalid token" in msg:
+            self._logger.debug("Token expired, resetting token")
+            if self.__connection_token is not None:
+                self._token_manager.reset_token(token=self.__connection_token)
+            # The automatic reconnection would reuse the expired token, the next emission connects again with a new one
+            await self.__client.disconnect()
+        else:
+            self._logger.error(msg=f"Exception received from the server with message {msg}")
+
+    async def __connect(self) -> None:
+        async with self.__connection_lock:
+            if self.__client.connected:
+                return
+
+            token: str = await self._token_manager.get_token()
+            self.__connection_token = token
+            await self.__client.connect(
+                url=self.__socket_url,
+                headers={"Authorization": f"Bearer {token}"},
+                transports=["websocket"],
+                wait_timeout=CONNECTION_TIMEOUT_SECONDS,
+            )
 
             if not self.__client.connected:
                 raise exceptions.ConnectionError()
 
-            for event, measurement in tuples_event_measurement:
-                self.__client.call(event=event, data=json.dumps(obj=measurement.to_dict()))
-                self._logger.info(msg=f"Measurement passed through the event {event} correctly")
+    async def emit_measurements(self, tuples_event_measurement: List[tuple[str, Measurement]]) -> None:
+        try:
+            if self.__batch_emits:
+                # A single frame per event carries the list of its measurements
+                measurements_by_event: dict[str, List[Measurement]] = {}
+                for event, measurement in tuples_event_measurement:
+                    measurements_by_event.setdefault(event, []).append(measurement)
+
+                emissions: List[tuple[str, str | bytes, int]] = [
+                    (event, self.__encode_batch(measurements=measurements), len(measurements))
+                    for event, measurements in measurements_by_event.items()
+                ]
+            else:
+                emissions: List[tuple[str, str | bytes, int]] = [
+                    (event, self.__encode(measurement=measurement), 1) for event, measurement in tuples_event_measurement
+                ]
+
+            # Every emission is retried on its own, the ones already delivered are never sent again
+            results: List[Optional[BaseException]] = await asyncio.gather(
+                *(self.__emit(event=event, data=data, count=count) for event, data, count in emissions), return_exceptions=True
+            )
+            errors: List[BaseException] = [result for result in results if isinstance(result, BaseException)]
+            if len(errors) > 0:
+                raise errors[0]
         except socketio.exceptions.ConnectionError as e:
             self._logger.error(msg=f"Socket not connected to the server {self.__socket_url}", exc_info=e)
             raise
         except Exception as e:
             self._logger.error(msg=f"Unexpected socket error {e}", exc_info=e)
             raise
+
+    def __encode(self, measurement: Measurement) -> str | bytes:
+        return measurement.to_msgpack() if self.__binary_payloads else json.dumps(obj=measurement.to_dict())
+
+    def __encode_batch(self, measurements: List[Measurement]) -> str | bytes:
+        if self.__binary_payloads:
+            # Every measurement is packed on its own, a msgpack array is its header followed by the items
+            return msgpack.Packer().pack_array_header(len(measurements)) + b"".join(measurement.to_msgpack() for measurement in measurements)
+
+        return json.dumps(obj=[measurement.to_dict() for measurement in measurements])
+
+    @retry(
+        reraise=True,
+        stop=(stop_after_attempt(NUMBER_OF_ATTEMPTS)),
+        wait=wait_random(min=WAITING_TIME_MIN, max=WAITING_TIME_MAX),
+        before_sleep=_count_retry,
+    )
+    async def __emit(self, event: str, data: str | bytes, count: int) -> None:
+        await self.__connect()
+
+        payload_size: int = len(data) if isinstance(data, bytes) else len(data.encode())
+        started_at: float = time.perf_counter()
+
+        if self.__acknowledgement_window is not None:
+            await self.__emit_without_waiting(event=event, data=data, count=count, started_at=started_at, payload_size=payload_size)
+            return
+
+        try:
+            await self.__client.call(event=event, data=data, timeout=ACKNOWLEDGEMENT_TIMEOUT_SECONDS)
+        finally:
+            _observe_delivery(channel="socket", started_at=started_at, payload_size=payload_size)
+
+        self._logger.info(msg=f"Measurements ({count}) passed through the event {event} correctly")
+
+    async def __emit_without_waiting(self, event: str, data: str | bytes, count: int, started_at: float, payload_size: int) -> None:
+        # Only a full window makes the emission wait, for the oldest acknowledgement
+        await self.__acknowledgement_window.acquire()
+        acknowledgement: asyncio.Future = asyncio.get_running_loop().create_future()
+
+        def acknowledge(*_) -> None:
+            if not acknowledgement.done():
+                acknowledgement.set_result(None)
+
+        try:
+            await self.__client.emit(event=event, data=data, callback=acknowledge)
+        except Exception:
+            self.__acknowledgement_window.release()
+            raise
+
+        task: asyncio.Task = asyncio.create_task(
+            self.__wait_for_acknowledgement(
+                event=event, acknowledgement=acknowledgement, count=count, started_at=started_at, payload_size=payload_size
+            )
+        )
+        self.__pending_acknowledgements.add(task)
+        task.add_done_callback(self.__pending_acknowledgements.discard)
+
+    async def __wait_for_acknowledgement(self, event: str, acknowledgement: asyncio.Future, count: int, started_at: float, payload_size: int) -> None:
+        try:
+            await asyncio.wait_for(acknowledgement, timeout=ACKNOWLEDGEMENT_TIMEOUT_SECONDS)
+            self._logger.info(msg=f"Measurements ({count}) passed through the event {event} correctly")
+        except asyncio.TimeoutError:
+            # The socket is a live feed, the measurements are not emitted again and the API keeps the durable copy
+            metrics_registry.increment_counter(
+                name="wsp_socket_acknowledgement_timeouts_total",
+                description="Socket emissions never acknowledged by the server",
+                labels={"event": event},
+            )
+            self._logger.warning(msg=f"Measurements ({count}) emitted through the event {event} were not acknowledged")
         finally:
-            if self.__client.connected:
-                self.__client.disconnect()
+            _observe_delivery(channel="socket", started_at=started_at, payload_size=payload_size)
+            self.__acknowledgement_window.release()
+
+    async def close(self) -> None:
+        # The emissions still in the window are given their time to be acknowledged
+        await asyncio.gather(*self.__pending_acknowledgements, return_exceptions=True)
+
+        if self.__client.connected:
+            await self.__client.disconnect()
+
+        await super().close()
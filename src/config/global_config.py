@@ -1,5 +1,5 @@
 import os
-from typing import final
+from typing import final, List, Optional
 
 from src.helpers.helpers import get_bool_from_string
 
@@ -8,8 +8,9 @@ class Environment:
     __DEVELOPMENT: str = "development"
     __TESTING: str = "testing"
     __PRODUCTION: str = "production"
+    __SIMULATION: str = "simulation"
 
-    __slots__ = ["__is_production", "__is_testing", "__is_development", "__read_only"]
+    __slots__ = ["__is_production", "__is_testing", "__is_development", "__is_simulation", "__read_only"]
 
     def __init__(self) -> None:
         environment: str = os.environ.get("ENVIRONMENT", self.__DEVELOPMENT)
@@ -17,6 +18,7 @@ class Environment:
         self.__is_production = environment == self.__PRODUCTION
         self.__is_development = environment == self.__DEVELOPMENT
         self.__is_testing = environment == self.__TESTING
+        self.__is_simulation = environment == self.__SIMULATION
         self.__read_only = get_bool_from_string(os.environ.get("READ_ONLY", "False"))
 
         if not self.__is_production:
@@ -35,6 +37,15 @@ class Environment:
     def is_testing(self) -> bool:
         return self.__is_testing
 
+    @property
+    def is_simulation(self) -> bool:
+        return self.__is_simulation
+
+    @property
+    def uses_hardware(self) -> bool:
+        # The simulation runs the same drivers as production against simulated hardware
+        return self.__is_production or self.__is_simulation
+
     @property
     def read_only(self) -> bool:
         return self.__read_only
@@ -61,6 +72,9 @@ class ApiConfig:
         "__add_ground_temperature_endpoint",
         "__add_wind_measurement_endpoint",
         "__add_rainfall_measurement_endpoint",
+        "__bulk_mode_enabled",
+        "__add_measurements_in_bulk_endpoint",
+        "__token_path",
     ]
 
     def __init__(self) -> None:
@@ -72,6 +86,10 @@ class ApiConfig:
         self.__add_ground_temperature_endpoint = self.__root_url + "/measurements/ground-temperature"
         self.__add_wind_measurement_endpoint = self.__root_url + "/measurements/wind-measurement"
         self.__add_rainfall_measurement_endpoint = self.__root_url + "/measurements/rainfall"
+        self.__bulk_mode_enabled = get_bool_from_string(os.environ.get("API_BULK_MODE_ENABLED", "False"))
+        self.__add_measurements_in_bulk_endpoint = os.environ.get("API_BULK_ENDPOINT", self.__root_url + "/measurements/bulk")
+        # File keeping the token across restarts, it is not persisted when empty
+        self.__token_path = os.environ.get("API_TOKEN_PATH", "data/token.json") or None
 
     @property
     def user(self) -> str:
@@ -105,6 +123,18 @@ class ApiConfig:
     def add_rainfall_measurement_endpoint(self) -> str:
         return self.__add_rainfall_measurement_endpoint
 
+    @property
+    def bulk_mode_enabled(self) -> bool:
+        return self.__bulk_mode_enabled
+
+    @property
+    def add_measurements_in_bulk_endpoint(self) -> str:
+        return self.__add_measurements_in_bulk_endpoint
+
+    @property
+    def token_path(self) -> Optional[str]:
+        return self.__token_path
+
 
 class SocketConfig:
     __slots__ = [
@@ -114,6 +144,9 @@ class SocketConfig:
         "__emit_wind_measurement_event",
         "__emit_rainfall_event",
         "__exception_event",
+        "__binary_payloads",
+        "__batch_emits",
+        "__acknowledgement_window",
     ]
 
     def __init__(self) -> None:
@@ -123,6 +156,12 @@ class SocketConfig:
         self.__emit_wind_measurement_event = "emitWindMeasurement"
         self.__emit_rainfall_event = "emitRainfall"
         self.__exception_event = "exception"
+        # MessagePack payloads instead of JSON strings, the server must decode them
+        self.__binary_payloads = get_bool_from_string(os.environ.get("SOCKET_BINARY_PAYLOADS", "False"))
+        # A single emission per event with the list of its measurements
+        self.__batch_emits = get_bool_from_string(os.environ.get("SOCKET_BATCH_EMITS", "False"))
+        # Emissions waiting for their acknowledgement at the same time, 0 waits for every acknowledgement before going on
+        self.__acknowledgement_window = int(os.environ.get("SOCKET_ACKNOWLEDGEMENT_WINDOW", "0"))
 
     @property
     def socket_url(self) -> str:
@@ -144,6 +183,18 @@ class SocketConfig:
     def emit_rainfall_event(self) -> str:
         return self.__emit_rainfall_event
 
+    @property
+    def binary_payloads(self) -> bool:
+        return self.__binary_payloads
+
+    @property
+    def batch_emits(self) -> bool:
+        return self.__batch_emits
+
+    @property
+    def acknowledgement_window(self) -> int:
+        return self.__acknowledgement_window
+
 
 class DeviceConfig:
     __slots__ = [
@@ -156,6 +207,26 @@ class DeviceConfig:
         "__anemometer_enabled",
         "__anemometer_port",
         "__rain_gauge_port",
+        "__anemometer_bounce_time",
+        "__rain_gauge_bounce_time",
+        "__wind_speed_percentile_window",
+        "__sensor_read_timeout",
+        "__bme280_seconds_between_readings",
+        "__ground_temperature_seconds_between_readings",
+        "__anemometer_seconds_between_readings",
+        "__rain_gauge_seconds_between_readings",
+        "__vane_samples_per_reading",
+        "__vane_filter",
+        "__vane_hysteresis",
+        "__sensor_plugins",
+        "__bme280_mode",
+        "__bme280_temperature_oversampling",
+        "__bme280_pressure_oversampling",
+        "__bme280_humidity_oversampling",
+        "__bme280_filter_coefficient",
+        "__bme280_standby_time",
+        "__ground_temperature_sensor_ids",
+        "__ground_temperature_resolution",
     ]
 
     def __init__(self) -> None:
@@ -168,6 +239,43 @@ class DeviceConfig:
         self.__anemometer_enabled = get_bool_from_string(os.environ.get("ANEMOMETER_ENABLED", "False"))
         self.__anemometer_port = int(os.environ.get("ANEMOMETER_PORT", "22"))
         self.__rain_gauge_port = int(os.environ.get("RAIN_GAUGE_PORT", "25"))
+        # Debounce times in seconds, 0 disables the debounce
+        self.__anemometer_bounce_time = float(os.environ.get("ANEMOMETER_BOUNCE_TIME", "0")) or None
+        self.__rain_gauge_bounce_time = float(os.environ.get("RAIN_GAUGE_BOUNCE_TIME", "0")) or None
+        # Latest anemometer readings the 90th percentile of the wind speed is computed over, the other statistics take the whole window
+        self.__wind_speed_percentile_window = int(os.environ.get("WIND_SPEED_PERCENTILE_WINDOW", "1024"))
+        self.__sensor_read_timeout = float(os.environ.get("SENSOR_READ_TIMEOUT_SECONDS", "5"))
+        self.__bme280_seconds_between_readings = float(os.environ.get("BME280_SECONDS_BETWEEN_READINGS", "15"))
+        self.__ground_temperature_seconds_between_readings = float(os.environ.get("GROUND_TEMPERATURE_SECONDS_BETWEEN_READINGS", "15"))
+        self.__anemometer_seconds_between_readings = float(os.environ.get("ANEMOMETER_SECONDS_BETWEEN_READINGS", "15"))
+        self.__rain_gauge_seconds_between_readings = float(os.environ.get("RAIN_GAUGE_SECONDS_BETWEEN_READINGS", "15"))
+        self.__vane_samples_per_reading = int(os.environ.get("VANE_SAMPLES_PER_READING", "1"))
+        self.__vane_filter = os.environ.get("VANE_FILTER", "median")
+        self.__vane_hysteresis = float(os.environ.get("VANE_HYSTERESIS", "0"))
+        # Forced mode measures on every read, normal mode measures continuously every standby time (ms) and reads the last result
+        self.__bme280_mode = os.environ.get("BME280_MODE", "forced").lower()
+        self.__bme280_temperature_oversampling = int(os.environ.get("BME280_TEMPERATURE_OVERSAMPLING", "1"))
+        self.__bme280_pressure_oversampling = int(os.environ.get("BME280_PRESSURE_OVERSAMPLING", "1"))
+        self.__bme280_humidity_oversampling = int(os.environ.get("BME280_HUMIDITY_OVERSAMPLING", "1"))
+        self.__bme280_filter_coefficient = int(os.environ.get("BME280_FILTER_COEFFICIENT", "0"))
+        self.__bme280_standby_time = float(os.environ.get("BME280_STANDBY_TIME_MS", "1000"))
+        # 1-Wire probe ids to read in order, every probe found on the bus when empty
+        self.__ground_temperature_sensor_ids = [
+            sensor_id.strip() for sensor_id in os.environ.get("GROUND_TEMPERATURE_SENSOR_IDS", "").split(",") if sensor_id.strip()
+        ]
+        # Bits, from 9 to 12, the resolution of the probes is left untouched when empty
+        self.__ground_temperature_resolution = int(os.environ.get("GROUND_TEMPERATURE_RESOLUTION") or 0) or None
+        # Comma separated plugin[:instance] entries, the *_ENABLED flags are used when it is empty
+        self.__sensor_plugins: List[tuple[str, str]] = []
+        for entry in filter(None, [entry.strip() for entry in os.environ.get("SENSOR_PLUGINS", "").split(",")]):
+            plugin, _, instance = entry.partition(":")
+            instance = instance or plugin
+
+            # The instance names the scheduler jobs, the /latest entries and the metric labels of the sensor
+            if instance in [name for _, name in self.__sensor_plugins]:
+                raise ValueError(f"The sensor plugin instance {instance} is configured more than once in SENSOR_PLUGINS")
+
+            self.__sensor_plugins.append((plugin, instance))
 
     @property
     def minutes_between_readings(self) -> int:
@@ -205,13 +313,143 @@ class DeviceConfig:
     def rain_gauge_port(self) -> int:
         return self.__rain_gauge_port
 
+    @property
+    def anemometer_bounce_time(self) -> Optional[float]:
+        return self.__anemometer_bounce_time
+
+    @property
+    def rain_gauge_bounce_time(self) -> Optional[float]:
+        return self.__rain_gauge_bounce_time
+
+    @property
+    def wind_speed_percentile_window(self) -> int:
+        return self.__wind_speed_percentile_window
+
+    @property
+    def sensor_read_timeout(self) -> float:
+        return self.__sensor_read_timeout
+
+    @property
+    def bme280_seconds_between_readings(self) -> float:
+        return self.__bme280_seconds_between_readings
+
+    @property
+    def ground_temperature_seconds_between_readings(self) -> float:
+        return self.__ground_temperature_seconds_between_readings
+
+    @property
+    def anemometer_seconds_between_readings(self) -> float:
+        return self.__anemometer_seconds_between_readings
+
+    @property
+    def rain_gauge_seconds_between_readings(self) -> float:
+        return self.__rain_gauge_seconds_between_readings
+
+    @property
+    def vane_samples_per_reading(self) -> int:
+        return self.__vane_samples_per_reading
+
+    @property
+    def vane_filter(self) -> str:
+        return self.__vane_filter
+
+    @property
+    def vane_hysteresis(self) -> float:
+        return self.__vane_hysteresis
+
+    @property
+    def bme280_mode(self) -> str:
+        return self.__bme280_mode
+
+    @property
+    def bme280_temperature_oversampling(self) -> int:
+        return self.__bme280_temperature_oversampling
+
+    @property
+    def bme280_pressure_oversampling(self) -> int:
+        return self.__bme280_pressure_oversampling
+
+    @property
+    def bme280_humidity_oversampling(self) -> int:
+        return self.__bme280_humidity_oversampling
+
+    @property
+    def bme280_filter_coefficient(self) -> int:
+        return self.__bme280_filter_coefficient
+
+    @property
+    def bme280_standby_time(self) -> float:
+        return self.__bme280_standby_time
+
+    @property
+    def ground_temperature_sensor_ids(self) -> List[str]:
+        return self.__ground_temperature_sensor_ids
+
+    @property
+    def ground_temperature_resolution(self) -> Optional[int]:
+        return self.__ground_temperature_resolution
+
+    @property
+    def sensor_plugins(self) -> List[tuple[str, str]]:
+        return self.__sensor_plugins
+
+
+class OutboxConfig:
+    __slots__ = ["__path", "__max_entries", "__batch_size", "__seconds_between_drains"]
+
+    def __init__(self) -> None:
+        self.__path = os.environ.get("OUTBOX_PATH", "data/outbox.db")
+        self.__max_entries = int(os.environ.get("OUTBOX_MAX_ENTRIES", "100000"))
+        self.__batch_size = int(os.environ.get("OUTBOX_BATCH_SIZE", "100"))
+        self.__seconds_between_drains = int(os.environ.get("OUTBOX_SECONDS_BETWEEN_DRAINS", "60"))
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def max_entries(self) -> int:
+        return self.__max_entries
+
+    @property
+    def batch_size(self) -> int:
+        return self.__batch_size
+
+    @property
+    def seconds_between_drains(self) -> int:
+        return self.__seconds_between_drains
+
+
+class LocalServerConfig:
+    __slots__ = ["__enabled", "__host", "__port"]
+
+    def __init__(self) -> None:
+        self.__enabled = get_bool_from_string(os.environ.get("LOCAL_SERVER_ENABLED", "False"))
+        self.__host = os.environ.get("LOCAL_SERVER_HOST", "0.0.0.0")
+        self.__port = int(os.environ.get("LOCAL_SERVER_PORT", "9464"))
+
+    @property
+    def enabled(self) -> bool:
+        return self.__enabled
+
+    @property
+    def host(self) -> str:
+        return self.__host
+
+    @property
+    def port(self) -> int:
+        return self.__port
+
 
 class OtelConfig:
-    __slots__ = ["__root_url", "__debug_in_console", "_attrs"]
+    __slots__ = ["__root_url", "__debug_in_console", "__profile", "__spool_path", "__spool_max_bytes", "_attrs"]
 
     def __init__(self) -> None:
         self.__root_url = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
         self.__debug_in_console = get_bool_from_string(os.environ.get("OTEL_DEBUG_IN_CONSOLE", "False"))
+        self.__profile = os.environ.get("OTEL_PROFILE", "minimal").lower()
+        self.__spool_path = os.environ.get("OTEL_SPOOL_PATH", "data/otel")
+        self.__spool_max_bytes = int(os.environ.get("OTEL_SPOOL_MAX_BYTES", str(16 * 1024 * 1024)))
         self._attrs = {
             "service.name": "wsp-sensors",
             "service.version": os.environ.get("OTEL_SERVICE_VERSION", "0.0.1"),
@@ -226,14 +464,72 @@ class OtelConfig:
     def debug_in_console(self) -> bool:
         return self.__debug_in_console
 
+    @property
+    def profile(self) -> str:
+        return self.__profile
+
+    @property
+    def spool_path(self) -> str:
+        return self.__spool_path
+
+    @property
+    def spool_max_bytes(self) -> int:
+        # Per signal, the oldest spooled exports are discarded over it
+        return self.__spool_max_bytes
+
     @property
     def attrs(self) -> dict[str, str]:
         return self._attrs
 
 
+class SimulatorConfig:
+    __slots__ = ["__trace_path", "__time_scale", "__storm_factor", "__ground_probes", "__seed", "__seconds_between_flushes", "__duration_seconds"]
+
+    def __init__(self) -> None:
+        # CSV file with the recorded weather, a synthetic one is generated when empty
+        self.__trace_path = os.environ.get("SIMULATOR_TRACE_PATH") or None
+        # Seconds of weather played per real second, 3600 plays a day in 24 minutes
+        self.__time_scale = float(os.environ.get("SIMULATOR_TIME_SCALE", "1"))
+        # Multiplies the wind speed and the rain rate of the trace, so storms and the pulse rates they cause can be reproduced
+        self.__storm_factor = float(os.environ.get("SIMULATOR_STORM_FACTOR", "1"))
+        self.__ground_probes = int(os.environ.get("SIMULATOR_GROUND_PROBES", "2"))
+        self.__seed = int(os.environ.get("SIMULATOR_SEED", "0"))
+        self.__seconds_between_flushes = float(os.environ.get("SIMULATOR_SECONDS_BETWEEN_FLUSHES", "60"))
+        # 0 runs until interrupted
+        self.__duration_seconds = float(os.environ.get("SIMULATOR_DURATION_SECONDS", "0"))
+
+    @property
+    def trace_path(self) -> Optional[str]:
+        return self.__trace_path
+
+    @property
+    def time_scale(self) -> float:
+        return self.__time_scale
+
+    @property
+    def storm_factor(self) -> float:
+        return self.__storm_factor
+
+    @property
+    def ground_probes(self) -> int:
+        return self.__ground_probes
+
+    @property
+    def seed(self) -> int:
+        return self.__seed
+
+    @property
+    def seconds_between_flushes(self) -> float:
+        return self.__seconds_between_flushes
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.__duration_seconds
+
+
 @final
 class GlobalConfig:
-    __slots__ = ["__environment", "__log", "__api", "__socket", "__device", "__otel"]
+    __slots__ = ["__environment", "__log", "__api", "__socket", "__device", "__outbox", "__local_server", "__otel", "__simulator"]
 
     def __init__(self) -> None:
         self.__environment = Environment()
@@ -241,7 +537,10 @@ class GlobalConfig:
         self.__api = ApiConfig()
         self.__socket = SocketConfig()
         self.__device = DeviceConfig()
+        self.__outbox = OutboxConfig()
+        self.__local_server = LocalServerConfig()
         self.__otel = OtelConfig()
+        self.__simulator = SimulatorConfig()
 
     @property
     def environment(self) -> Environment:
@@ -263,9 +562,21 @@ class GlobalConfig:
     def device(self) -> DeviceConfig:
         return self.__device
 
+    @property
+    def outbox(self) -> OutboxConfig:
+        return self.__outbox
+
+    @property
+    def local_server(self) -> LocalServerConfig:
+        return self.__local_server
+
     @property
     def otel(self) -> OtelConfig:
         return self.__otel
 
+    @property
+    def simulator(self) -> SimulatorConfig:
+        return self.__simulator
+
 
 global_config = GlobalConfig()
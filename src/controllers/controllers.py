@@ -1,25 +1,31 @@
 import logging
-from abc import ABC
+from typing import List, Optional
 
-from src.config.global_config import global_config
+from src.metrics.metrics import metrics_registry
 from src.model.models import Measurement
-from src.services.services import Service, AirMeasurementService, GroundTemperatureService, RainfallService, WindMeasurementService
+from src.services.services import Service
 
 
-class Controller(ABC):
-    __slots__ = ["__service", "__api_endpoint", "__socket_event", "__logger"]
+class Controller(object):
+    __slots__ = ["__name", "__service", "__api_endpoint", "__socket_event", "__last_measurements", "__logger"]
 
-    def __init__(self, service: Service, api_endpoint: str, socket_event: str) -> None:
+    def __init__(self, name: str, service: Service, api_endpoint: str, socket_event: str) -> None:
+        self.__name = name
         self.__service = service
         self.__api_endpoint = api_endpoint
         self.__socket_event = socket_event
+        self.__last_measurements: List[Measurement] = []
         self.__logger = logging.getLogger(name=self.__class__.__name__)
 
         self.__logger.debug(
-            msg=f"Controller initialized with the service {self.__service.__class__.__name__}"
+            msg=f"Controller {self.__name} initialized with the service {self.__service.__class__.__name__}"
             f" API endpoint {self.__api_endpoint} and socket event {self.__socket_event}"
         )
 
+    @property
+    def name(self) -> str:
+        return self.__name
+
     @property
     def api_endpoint(self) -> str:
         return self.__api_endpoint
@@ -28,44 +34,32 @@ class Controller(ABC):
     def socket_event(self) -> str:
         return self.__socket_event
 
-    async def get_measurement(self) -> Measurement:
-        measurement: Measurement = await self.__service.get_measurement()
-        self.__logger.info(msg=f"Measurement obtained from {self.__service.__class__.__name__}: {measurement.to_dict()}")
-
-        return measurement
-
-
-class AirMeasurementsController(Controller):
-    def __init__(self) -> None:
-        super().__init__(
-            service=AirMeasurementService(),
-            api_endpoint=global_config.api.add_air_measurement_endpoint,
-            socket_event=global_config.socket.emit_air_measurement_event,
-        )
-
-
-class GroundTemperatureController(Controller):
-    def __init__(self) -> None:
-        super().__init__(
-            service=GroundTemperatureService(),
-            api_endpoint=global_config.api.add_ground_temperature_endpoint,
-            socket_event=global_config.socket.emit_ground_temperature_event,
-        )
-
-
-class RainfallController(Controller):
-    def __init__(self) -> None:
-        super().__init__(
-            service=RainfallService(),
-            api_endpoint=global_config.api.add_rainfall_measurement_endpoint,
-            socket_event=global_config.socket.emit_rainfall_event,
-        )
-
+    @property
+    def last_measurements(self) -> List[Measurement]:
+        return self.__last_measurements
 
-class WindMeasurementController(Controller):
-    def __init__(self) -> None:
-        super().__init__(
-            service=WindMeasurementService(anemometer_port=global_config.device.anemometer_port),
-            api_endpoint=global_config.api.add_wind_measurement_endpoint,
-            socket_event=global_config.socket.emit_wind_measurement_event,
-        )
+    @property
+    def seconds_between_readings(self) -> Optional[float]:
+        return self.__service.seconds_between_readings
+
+    async def sample(self) -> None:
+        await self.__service.sample()
+
+    async def get_measurements(self) -> List[Measurement]:
+        measurements: List[Measurement] = await self.__service.get_measurements()
+        self.__last_measurements = measurements
+
+        for measurement in measurements:
+            data: dict[str, int | str | dict[str, dict[str, float]]] = measurement.to_dict()
+            self.__logger.info(msg=f"Measurement obtained from {self.__name}: {data}")
+
+            for field, value in data.items():
+                if isinstance(value, (int, float)):
+                    metrics_registry.set_gauge(
+                        name="wsp_measurement_value",
+                        description="Last aggregated value of a measurement field",
+                        value=value,
+                        labels={"controller": self.__name, "sensor": measurement.sensor_id or "", "field": field},
+                    )
+
+        return measurements
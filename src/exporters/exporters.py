@@ -0,0 +1,164 @@
+import gzip
+import logging
+import os
+import threading
+import time
+from http import HTTPStatus
+from typing import List, Sequence
+
+import requests
+from opentelemetry.exporter.otlp.proto.common._log_encoder import encode_logs
+from opentelemetry.exporter.otlp.proto.common.metrics_encoder import encode_metrics
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk._logs.export import LogExporter, LogExportResult
+from opentelemetry.sdk.metrics.export import MetricExporter, MetricExportResult, MetricsData
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+EXPORT_TIMEOUT_SECONDS: int = 10
+SPOOLED_FILES_PER_EXPORT: int = 20
+SPOOL_FILE_EXTENSION: str = ".pb.gz"
+RETRYABLE_STATUSES: frozenset[int] = frozenset([HTTPStatus.REQUEST_TIMEOUT, HTTPStatus.TOO_MANY_REQUESTS])
+
+
+class SpooledSender(object):
+    __slots__ = ["__end_point", "__directory", "__max_bytes", "__session", "__lock", "__logger"]
+
+    def __init__(self, end_point: str, directory: str, max_bytes: int) -> None:
+        self.__logger = logging.getLogger(name=self.__class__.__name__)
+
+        self.__end_point = end_point
+        self.__directory = directory
+        self.__max_bytes = max_bytes
+        self.__session = requests.Session()
+        self.__lock = threading.Lock()
+
+        os.makedirs(name=self.__directory, exist_ok=True)
+
+    def send(self, body: bytes) -> bool:
+        compressed_body: bytes = gzip.compress(data=body)
+
+        with self.__lock:
+            # The spooled payloads are sent first, nothing new is attempted while the collector is unreachable
+            if self.__send_spooled() and self.__post(data=compressed_body):
+                return True
+
+            try:
+                self.__spool(data=compressed_body)
+                return True
+            except OSError as e:
+                self.__logger.debug(msg=f"Telemetry could not be spooled in {self.__directory}", exc_info=e)
+                return False
+
+    def shutdown(self) -> None:
+        self.__session.close()
+
+    def __send_spooled(self) -> bool:
+        # A few files per export keep every export short, the backlog is drained over the next ones
+        for file_name in self.__get_spooled_files()[:SPOOLED_FILES_PER_EXPORT]:
+            path: str = os.path.join(self.__directory, file_name)
+
+            with open(file=path, mode="rb") as file:
+                if not self.__post(data=file.read()):
+                    return False
+
+            os.remove(path=path)
+
+        return True
+
+    def __post(self, data: bytes) -> bool:
+        try:
+            response: requests.Response = self.__session.post(
+                url=self.__end_point,
+                data=data,
+                headers={"Content-Type": "application/x-protobuf", "Content-Encoding": "gzip"},
+                timeout=EXPORT_TIMEOUT_SECONDS,
+            )
+        except requests.RequestException as e:
+            self.__logger.debug(msg=f"Telemetry could not be exported to {self.__end_point}", exc_info=e)
+            return False
+
+        if response.ok:
+            return True
+
+        if HTTPStatus.BAD_REQUEST <= response.status_code < HTTPStatus.INTERNAL_SERVER_ERROR and response.status_code not in RETRYABLE_STATUSES:
+            # The collector will never accept it, keeping it would block the spool
+            self.__logger.debug(msg=f"Telemetry rejected by {self.__end_point} with the response ({response.status_code}) {response.reason}")
+            return True
+
+        return False
+
+    def __spool(self, data: bytes) -> None:
+        with open(file=os.path.join(self.__directory, f"{time.time_ns()}{SPOOL_FILE_EXTENSION}"), mode="wb") as file:
+            file.write(data)
+
+        file_names: List[str] = self.__get_spooled_files()
+        sizes: List[int] = [os.path.getsize(filename=os.path.join(self.__directory, file_name)) for file_name in file_names]
+        total_size: int = sum(sizes)
+
+        for file_name, size in zip(file_names, sizes):
+            if total_size <= self.__max_bytes:
+                break
+
+            os.remove(path=os.path.join(self.__directory, file_name))
+            total_size -= size
+
+    def __get_spooled_files(self) -> List[str]:
+        # The names are nanosecond timestamps, so the lexical order is the chronological one
+        return sorted(file_name for file_name in os.listdir(path=self.__directory) if file_name.endswith(SPOOL_FILE_EXTENSION))
+
+
+class SpoolingSpanExporter(SpanExporter):
+    __slots__ = ["__sender"]
+
+    def __init__(self, end_point: str, directory: str, max_bytes: int) -> None:
+        self.__sender = SpooledSender(end_point=end_point, directory=directory, max_bytes=max_bytes)
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        if self.__sender.send(body=encode_spans(spans).SerializeToString()):
+            return SpanExportResult.SUCCESS
+
+        return SpanExportResult.FAILURE
+
+    def shutdown(self) -> None:
+        self.__sender.shutdown()
+
+
+class SpoolingMetricExporter(MetricExporter):
+    __slots__ = ["__sender"]
+
+    def __init__(self, end_point: str, directory: str, max_bytes: int) -> None:
+        super().__init__()
+
+        self.__sender = SpooledSender(end_point=end_point, directory=directory, max_bytes=max_bytes)
+
+    def export(self, metrics_data: MetricsData, timeout_millis: float = 10_000, **kwargs) -> MetricExportResult:
+        if self.__sender.send(body=encode_metrics(metrics_data).SerializeToString()):
+            return MetricExportResult.SUCCESS
+
+        return MetricExportResult.FAILURE
+
+    def force_flush(self, timeout_millis: float = 10_000) -> bool:
+        return True
+
+    def shutdown(self, timeout_millis: float = 30_000, **kwargs) -> None:
+        self.__sender.shutdown()
+
+
+class SpoolingLogExporter(LogExporter):
+    __slots__ = ["__sender"]
+
+    def __init__(self, end_point: str, directory: str, max_bytes: int) -> None:
+        self.__sender = SpooledSender(end_point=end_point, directory=directory, max_bytes=max_bytes)
+
+    def export(self, batch: Sequence) -> LogExportResult:
+        if self.__sender.send(body=encode_logs(batch).SerializeToString()):
+            return LogExportResult.SUCCESS
+
+        return LogExportResult.FAILURE
+
+    def force_flush(self, timeout_millis: int = 30_000) -> bool:
+        return True
+
+    def shutdown(self) -> None:
+        self.__sender.shutdown()
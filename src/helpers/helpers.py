@@ -1,2 +1,35 @@
+import time
+from typing import List
+
+
 def get_bool_from_string(value: str) -> bool:
     return value.lower() in ["true", "t", "1"]
+
+
+class StartupTimer(object):
+    __slots__ = ["__started_at", "__last_mark", "__phases"]
+
+    def __init__(self) -> None:
+        self.__started_at = time.perf_counter()
+        self.__last_mark = self.__started_at
+        self.__phases: List[tuple[str, float]] = []
+
+    @property
+    def phases(self) -> List[tuple[str, float]]:
+        return self.__phases
+
+    @property
+    def total(self) -> float:
+        return self.__last_mark - self.__started_at
+
+    def mark(self, phase: str) -> None:
+        now: float = time.perf_counter()
+        self.__phases.append((phase, now - self.__last_mark))
+        self.__last_mark = now
+
+    def __str__(self) -> str:
+        return ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in self.__phases) + f" (total {self.total:.3f}s)"
+
+
+# Created when the module is first imported, main imports it before anything else
+startup_timer = StartupTimer()
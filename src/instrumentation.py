@@ -1,72 +1,197 @@
 import logging
-
-from opentelemetry import trace, metrics
-from opentelemetry._logs import set_logger_provider
-from opentelemetry.exporter.otlp.proto.http._log_exporter import OTLPLogExporter
-from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
-from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
-from opentelemetry.sdk._logs._internal.export import BatchLogRecordProcessor, ConsoleLogExporter, LogExporter
-from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.sdk.metrics._internal.export import MetricExporter
-from opentelemetry.sdk.metrics.export import (
-    ConsoleMetricExporter,
-    PeriodicExportingMetricReader,
-)
-from opentelemetry.sdk.resources import Resource, SERVICE_NAME, SERVICE_VERSION, DEPLOYMENT_ENVIRONMENT
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List
 
 from src.config.global_config import global_config
 
+if TYPE_CHECKING:
+    from opentelemetry.sdk._logs import LoggerProvider
+    from opentelemetry.sdk._logs.export import LogExporter
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import MetricExporter
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SpanExporter
+
+# The SDK, the exporters and the instrumentors are imported only by the profiles that use them, they account for a good
+# part of the start up time on the smaller boards
+
+PROFILE_OFF: str = "off"
+# Loggers of the telemetry export itself, their records are kept out of the exported logs so exporting does not feed itself
+EXPORTER_LOGGERS: tuple[str, ...] = ("SpooledSender", "urllib3", "requests")
+
+
+@dataclass(frozen=True)
+class TelemetryProfile:
+    sampling_ratio: float
+    export_interval_millis: int
+    schedule_delay_millis: int
+    max_queue_size: int
+    max_export_batch_size: int
+    log_level: int
+    instrument_asyncio: bool
+    instrument_aiohttp_client: bool
+
+
+# "off" sets no provider at all, the API falls back to its no-op implementations
+TELEMETRY_PROFILES: dict[str, TelemetryProfile] = {
+    "minimal": TelemetryProfile(
+        sampling_ratio=0.05,
+        export_interval_millis=300_000,
+        schedule_delay_millis=60_000,
+        max_queue_size=256,
+        max_export_batch_size=128,
+        log_level=logging.WARNING,
+        instrument_asyncio=False,
+        instrument_aiohttp_client=True,
+    ),
+    "full": TelemetryProfile(
+        sampling_ratio=1.0,
+        export_interval_millis=60_000,
+        schedule_delay_millis=5_000,
+        max_queue_size=2048,
+        max_export_batch_size=512,
+        log_level=logging.NOTSET,
+        instrument_asyncio=True,
+        instrument_aiohttp_client=True,
+    ),
+}
+
+_providers: List["TracerProvider | MeterProvider | LoggerProvider"] = []
+
 
 # Useful links
 #  https://opentelemetry.io/docs/languages/python/
 #  https://opentelemetry.io/docs/concepts/semantic-conventions/
 #  https://github.com/open-telemetry/opentelemetry-python-contrib/tree/main/instrumentation#readme
-def get_processor() -> BatchSpanProcessor:
+def get_span_exporter() -> "SpanExporter":
     if global_config.otel.debug_in_console:
-        return BatchSpanProcessor(ConsoleSpanExporter())
-
-    return BatchSpanProcessor(span_exporter=OTLPSpanExporter(endpoint=f"{global_config.otel.root_url}/v1/traces"))
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
 
+        return ConsoleSpanExporter()
 
-def get_metric_exporter() -> MetricExporter:
-    if global_config.otel.debug_in_console:
-        return ConsoleMetricExporter()
+    from src.exporters.exporters import SpoolingSpanExporter
 
-    return OTLPMetricExporter(endpoint=f"{global_config.otel.root_url}/v1/metrics")
+    return SpoolingSpanExporter(
+        end_point=f"{global_config.otel.root_url}/v1/traces",
+        directory=os.path.join(global_config.otel.spool_path, "traces"),
+        max_bytes=global_config.otel.spool_max_bytes,
+    )
 
 
-def get_log_exporter() -> LogExporter:
+def get_metric_exporter() -> "MetricExporter":
     if global_config.otel.debug_in_console:
-        return ConsoleLogExporter()
+        from opentelemetry.sdk.metrics.export import ConsoleMetricExporter
 
-    return OTLPLogExporter(endpoint=f"{global_config.otel.root_url}/v1/logs")
+        return ConsoleMetricExporter()
 
+    from src.exporters.exporters import SpoolingMetricExporter
 
-resources: Resource = Resource.create(
-    attributes={
-        SERVICE_NAME: global_config.otel.attrs[SERVICE_NAME],
-        SERVICE_VERSION: global_config.otel.attrs[SERVICE_VERSION],
-        DEPLOYMENT_ENVIRONMENT: global_config.otel.attrs[DEPLOYMENT_ENVIRONMENT],
-    }
-)
+    return SpoolingMetricExporter(
+        end_point=f"{global_config.otel.root_url}/v1/metrics",
+        directory=os.path.join(global_config.otel.spool_path, "metrics"),
+        max_bytes=global_config.otel.spool_max_bytes,
+    )
 
-# Traces
-tracer_provider = TracerProvider(resource=resources)
-tracer_provider.add_span_processor(span_processor=get_processor())
-trace.set_tracer_provider(tracer_provider=tracer_provider)
 
-# Metrics
-metric_reader = PeriodicExportingMetricReader(exporter=get_metric_exporter())
-meter_provider = MeterProvider(resource=resources, metric_readers=[metric_reader])
-metrics.set_meter_provider(meter_provider=meter_provider)
+def get_log_exporter() -> "LogExporter":
+    if global_config.otel.debug_in_console:
+        from opentelemetry.sdk._logs.export import ConsoleLogExporter
 
-# Logs
-logger_provider = LoggerProvider(resource=resources)
-set_logger_provider(logger_provider=logger_provider)
+        return ConsoleLogExporter()
 
-logger_provider.add_log_record_processor(log_record_processor=BatchLogRecordProcessor(exporter=get_log_exporter()))
-logging.getLogger().setLevel(level=logging.getLevelName(global_config.log.level.upper()))
-logging.getLogger().addHandler(LoggingHandler(level=logging.getLevelName(global_config.log.level.upper()), logger_provider=logger_provider))
+    from src.exporters.exporters import SpoolingLogExporter
+
+    return SpoolingLogExporter(
+        end_point=f"{global_config.otel.root_url}/v1/logs",
+        directory=os.path.join(global_config.otel.spool_path, "logs"),
+        max_bytes=global_config.otel.spool_max_bytes,
+    )
+
+
+def is_not_exporter_record(record: logging.LogRecord) -> bool:
+    return not any(record.name == name or record.name.startswith(f"{name}.") for name in EXPORTER_LOGGERS)
+
+
+def setup_telemetry() -> None:
+    log_level: int = logging.getLevelName(global_config.log.level.upper())
+    logging.getLogger().setLevel(level=log_level)
+
+    if global_config.otel.profile == PROFILE_OFF:
+        return
+
+    if global_config.otel.profile not in TELEMETRY_PROFILES:
+        raise ValueError(f"Unknown telemetry profile {global_config.otel.profile}")
+
+    from opentelemetry import metrics, trace
+    from opentelemetry._logs import set_logger_provider
+    from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
+    from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+    from opentelemetry.sdk.resources import DEPLOYMENT_ENVIRONMENT, SERVICE_NAME, SERVICE_VERSION, Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    profile: TelemetryProfile = TELEMETRY_PROFILES[global_config.otel.profile]
+    resources: Resource = Resource.create(
+        attributes={
+            SERVICE_NAME: global_config.otel.attrs[SERVICE_NAME],
+            SERVICE_VERSION: global_config.otel.attrs[SERVICE_VERSION],
+            DEPLOYMENT_ENVIRONMENT: global_config.otel.attrs[DEPLOYMENT_ENVIRONMENT],
+        }
+    )
+
+    # Traces
+    tracer_provider = TracerProvider(resource=resources, sampler=ParentBased(root=TraceIdRatioBased(rate=profile.sampling_ratio)))
+    tracer_provider.add_span_processor(
+        span_processor=BatchSpanProcessor(
+            span_exporter=get_span_exporter(),
+            max_queue_size=profile.max_queue_size,
+            schedule_delay_millis=profile.schedule_delay_millis,
+            max_export_batch_size=profile.max_export_batch_size,
+        )
+    )
+    trace.set_tracer_provider(tracer_provider=tracer_provider)
+
+    # Metrics
+    metric_reader = PeriodicExportingMetricReader(exporter=get_metric_exporter(), export_interval_millis=profile.export_interval_millis)
+    meter_provider = MeterProvider(resource=resources, metric_readers=[metric_reader])
+    metrics.set_meter_provider(meter_provider=meter_provider)
+
+    # Logs
+    logger_provider = LoggerProvider(resource=resources)
+    set_logger_provider(logger_provider=logger_provider)
+
+    logger_provider.add_log_record_processor(
+        log_record_processor=BatchLogRecordProcessor(
+            exporter=get_log_exporter(),
+            max_queue_size=profile.max_queue_size,
+            schedule_delay_millis=profile.schedule_delay_millis,
+            max_export_batch_size=profile.max_export_batch_size,
+        )
+    )
+    logging_handler = LoggingHandler(level=max(log_level, profile.log_level), logger_provider=logger_provider)
+    logging_handler.addFilter(filter=is_not_exporter_record)
+    logging.getLogger().addHandler(logging_handler)
+
+    # Instrumentors
+    if profile.instrument_asyncio:
+        from opentelemetry.instrumentation.asyncio import AsyncioInstrumentor
+
+        AsyncioInstrumentor().instrument()
+
+    if profile.instrument_aiohttp_client:
+        from opentelemetry.instrumentation.aiohttp_client import AioHttpClientInstrumentor
+
+        AioHttpClientInstrumentor().instrument()
+
+    _providers.extend([logger_provider, meter_provider, tracer_provider])
+
+
+def shutdown_telemetry() -> None:
+    for provider in _providers:
+        provider.shutdown()
+
+    _providers.clear()
@@ -1,93 +1,135 @@
+# Imported first, the start up phases are measured from here
+from src.helpers.helpers import startup_timer
+
 import asyncio
 import logging
-from typing import List
-
-from opentelemetry.instrumentation.asyncio import AsyncioInstrumentor
+import time
+from typing import List, Optional
 
-from src.clients.clients import ApiClient, SocketClient
+from src.clients.clients import ApiClient, SocketClient, TokenManager
 from src.config.global_config import global_config
-from src.controllers.controllers import (
-    Controller,
-    AirMeasurementsController,
-    GroundTemperatureController,
-    RainfallController,
-    WindMeasurementController,
-)
-from src.instrumentation import logger_provider, meter_provider, tracer_provider
+from src.controllers.controllers import Controller
+from src.instrumentation import setup_telemetry, shutdown_telemetry
+from src.metrics.metrics import metrics_registry
 from src.model.models import Measurement
+from src.outbox.outbox import Outbox
+from src.plugins.plugins import create_controller, get_enabled_instances
+from src.scheduler.scheduler import Scheduler, wait_for_next_boundary
+from src.server.server import LocalServer
+from src.sensors.buses import close_bus_executors
+from src.sensors.hardware import close_hardware
+
+startup_timer.mark(phase="imports")
 
-AsyncioInstrumentor().instrument()
+setup_telemetry()
+startup_timer.mark(phase="telemetry")
 logger = logging.getLogger(name="main")
 
 
 def get_enabled_controllers() -> List[Controller]:
     controllers: List[Controller] = []
 
-    if global_config.device.bme280_sensor_enabled:
-        logger.info(msg=f"Adding {AirMeasurementsController.__name__}")
-        controllers.append(AirMeasurementsController())
-
-    if global_config.device.ground_temperature_sensor_enabled:
-        logger.info(msg=f"Adding {GroundTemperatureController.__name__}")
-        controllers.append(GroundTemperatureController())
-
-    if global_config.device.rain_gauge_enabled:
-        logger.info(msg=f"Adding {RainfallController.__name__}")
-        controllers.append(RainfallController())
-
-    if global_config.device.anemometer_enabled:
-        logger.info(msg=f"Adding {WindMeasurementController.__name__}")
-        controllers.append(WindMeasurementController())
+    for plugin_name, instance in get_enabled_instances():
+        logger.info(msg=f"Adding the sensor {instance} of the plugin {plugin_name}")
+        controllers.append(create_controller(plugin_name=plugin_name, instance=instance))
+        startup_timer.mark(phase=instance)
 
     return controllers
 
 
 async def main() -> int:
-    api_client = ApiClient(auth_url=global_config.api.auth_url, user=global_config.api.user, password=global_config.api.password)
-    socket_client = SocketClient(
-        socket_url=global_config.socket.socket_url,
+    # Both clients share the token, it is requested once and refreshed before it expires
+    token_manager = TokenManager(
         auth_url=global_config.api.auth_url,
         user=global_config.api.user,
         password=global_config.api.password,
+        path=global_config.api.token_path,
+    )
+    api_client = ApiClient(
+        token_manager=token_manager,
+        bulk_end_point=global_config.api.add_measurements_in_bulk_endpoint if global_config.api.bulk_mode_enabled else None,
+    )
+    socket_client = SocketClient(
+        socket_url=global_config.socket.socket_url,
+        token_manager=token_manager,
+        binary_payloads=global_config.socket.binary_payloads,
+        batch_emits=global_config.socket.batch_emits,
+        acknowledgement_window=global_config.socket.acknowledgement_window,
+    )
+    outbox = Outbox(
+        path=global_config.outbox.path,
+        max_entries=global_config.outbox.max_entries,
+        batch_size=global_config.outbox.batch_size,
+        seconds_between_drains=global_config.outbox.seconds_between_drains,
+        api_client=api_client,
     )
+    scheduler = Scheduler()
+    local_server: Optional[LocalServer] = None
+
+    exit_code: int = 0
 
     try:
         logger.info(msg="Application started")
+        await outbox.open()
+        startup_timer.mark(phase="outbox")
 
         logger.info(msg="Getting controllers to be initiated")
         controllers: List[Controller] = get_enabled_controllers()
-        logger.debug(msg=f"Controllers to be initiated: {[controller.__class__.__name__ for controller in controllers]}")
+        logger.debug(msg=f"Controllers to be initiated: {[controller.name for controller in controllers]}")
 
         if len(controllers) == 0:
             raise Exception("No controllers were enabled. Please enable at least one controller in the configuration")
 
-        while True:
-            if global_config.environment.is_production:
-                seconds_waiting: int = global_config.device.minutes_between_readings * 60
-            elif global_config.environment.is_testing:
-                seconds_waiting: int = 1
-            else:
-                seconds_waiting: int = 20
+        for controller in controllers:
+            if controller.seconds_between_readings is not None:
+                scheduler.schedule(name=controller.name, period=controller.seconds_between_readings, callback=controller.sample)
 
-            logger.info(msg=f"Sleeping {seconds_waiting} seconds while sensors are getting readings")
-            await asyncio.sleep(delay=seconds_waiting)
+        if global_config.local_server.enabled:
+            local_server = LocalServer(host=global_config.local_server.host, port=global_config.local_server.port, controllers=controllers)
+            await local_server.start()
+
+        startup_timer.mark(phase="scheduling")
+        # Warning, so the breakdown reaches the exporters with every telemetry profile
+        logger.warning(msg=f"Application started in {startup_timer}")
+
+        if global_config.environment.is_production:
+            seconds_waiting: int = global_config.device.minutes_between_readings * 60
+        elif global_config.environment.is_testing:
+            seconds_waiting: int = 1
+        elif global_config.environment.is_simulation:
+            seconds_waiting: float = global_config.simulator.seconds_between_flushes
+        else:
+            seconds_waiting: int = 20
+
+        while True:
+            logger.info(msg=f"Waiting for the next boundary of {seconds_waiting} seconds while sensors are getting readings")
+            await wait_for_next_boundary(period=seconds_waiting)
 
             try:
-                measurements: List[Measurement] = await asyncio.gather(*(controller.get_measurement() for controller in controllers))
+                started_at: float = time.perf_counter()
+                measurements: List[List[Measurement]] = await asyncio.gather(*(controller.get_measurements() for controller in controllers))
 
                 if global_config.environment.read_only:
                     logger.info(msg="Read only mode enabled. Measurements will not be added nor emitted")
                 else:
                     tuples_endpoint_measurement: List[tuple[str, Measurement]] = [
-                        (controller.api_endpoint, measurement) for controller, measurement in zip(controllers, measurements)
+                        (controller.api_endpoint, measurement)
+                        for controller, controller_measurements in zip(controllers, measurements)
+                        for measurement in controller_measurements
                     ]
                     tuples_event_measurement: List[tuple[str, Measurement]] = [
-                        (controller.socket_event, measurement) for controller, measurement in zip(controllers, measurements)
+                        (controller.socket_event, measurement)
+                        for controller, controller_measurements in zip(controllers, measurements)
+                        for measurement in controller_measurements
                     ]
-                    await asyncio.gather(
-                        api_client.add_measurements(tuples_endpoint_measurement=tuples_endpoint_measurement),
-                        socket_client.emit_measurements(tuples_event_measurement=tuples_event_measurement),
-                    )
+                    await outbox.add(tuples_endpoint_measurement=tuples_endpoint_measurement)
+                    await socket_client.emit_measurements(tuples_event_measurement=tuples_event_measurement)
+
+                metrics_registry.observe(
+                    name="wsp_flush_duration_seconds",
+                    description="Time taken to aggregate and hand over the measurements",
+                    value=time.perf_counter() - started_at,
+                )
 
                 if global_config.environment.is_testing:
                     break
@@ -98,9 +140,15 @@ async def main() -> int:
         exit_code = 1
     finally:
         logger.info(msg="Application finished")
-        logger_provider.shutdown()
-        meter_provider.shutdown()
-        tracer_provider.shutdown()
+        if local_server is not None:
+            await local_server.close()
+        await scheduler.close()
+        await outbox.close()
+        await asyncio.gather(api_client.close(), socket_client.close())
+        await token_manager.close()
+        close_bus_executors()
+        close_hardware()
+        shutdown_telemetry()
 
     return exit_code
 
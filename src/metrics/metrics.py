@@ -0,0 +1,210 @@
+import bisect
+import logging
+import math
+import threading
+from typing import List, Optional
+
+from opentelemetry import metrics
+from opentelemetry.metrics import Instrument, Meter
+
+METER_NAME: str = "wsp.sensors"
+DEFAULT_LATENCY_BUCKETS_SECONDS: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PAYLOAD_SIZE_BUCKETS_BYTES: tuple[float, ...] = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536, 262144)
+# Label sets over the limit are folded into a single overflow series, a misuse of the labels cannot exhaust the memory of the device
+MAX_LABEL_SETS_PER_METRIC: int = 64
+OVERFLOW_LABELS: tuple[tuple[str, str], ...] = (("otel_metric_overflow", "true"),)
+UNITS_BY_SUFFIX: dict[str, str] = {"_seconds": "s", "_bytes": "By"}
+
+
+class LatencyHistogram(object):
+    __slots__ = ["__buckets", "__bucket_counts", "__count", "__sum", "__lock"]
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_SECONDS) -> None:
+        self.__buckets = tuple(sorted(buckets))
+        # The last position counts the observations over the highest bucket
+        self.__bucket_counts = [0] * (len(self.__buckets) + 1)
+        self.__count = 0
+        self.__sum = 0.0
+        self.__lock = threading.Lock()
+
+    @property
+    def buckets(self) -> tuple[float, ...]:
+        return self.__buckets
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    @property
+    def sum(self) -> float:
+        return self.__sum
+
+    def observe(self, value: float) -> None:
+        with self.__lock:
+            self.__bucket_counts[bisect.bisect_left(self.__buckets, value)] += 1
+            self.__count += 1
+            self.__sum += value
+
+    def cumulative_counts(self) -> List[int]:
+        with self.__lock:
+            counts: List[int] = list(self.__bucket_counts)
+
+        for index in range(1, len(counts)):
+            counts[index] += counts[index - 1]
+
+        return counts
+
+
+class MetricsRegistry(object):
+    __COUNTER: str = "counter"
+    __GAUGE: str = "gauge"
+    __HISTOGRAM: str = "histogram"
+
+    __slots__ = ["__types", "__descriptions", "__values", "__histograms", "__label_sets", "__meter", "__instruments", "__lock", "__logger"]
+
+    def __init__(self) -> None:
+        self.__logger = logging.getLogger(name=self.__class__.__name__)
+
+        self.__types: dict[str, str] = {}
+        self.__descriptions: dict[str, str] = {}
+        self.__values: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+        self.__histograms: dict[tuple[str, tuple[tuple[str, str], ...]], LatencyHistogram] = {}
+        self.__label_sets: dict[str, set[tuple[tuple[str, str], ...]]] = {}
+        # Every metric is mirrored into an OpenTelemetry instrument, the meter is a proxy until the provider is set
+        self.__meter: Meter = metrics.get_meter(name=METER_NAME)
+        self.__instruments: dict[str, Instrument] = {}
+        self.__lock = threading.Lock()
+
+    def increment_counter(self, name: str, description: str, value: float = 1, labels: Optional[dict[str, str]] = None) -> None:
+        key: tuple[str, tuple[tuple[str, str], ...]] = self.__register(name=name, description=description, metric_type=self.__COUNTER, labels=labels)
+
+        with self.__lock:
+            self.__values[key] = self.__values.get(key, 0) + value
+
+        self.__instruments[name].add(amount=value, attributes=dict(key[1]))
+
+    def set_gauge(self, name: str, description: str, value: float, labels: Optional[dict[str, str]] = None) -> None:
+        key: tuple[str, tuple[tuple[str, str], ...]] = self.__register(name=name, description=description, metric_type=self.__GAUGE, labels=labels)
+
+        with self.__lock:
+            self.__values[key] = value
+
+        self.__instruments[name].set(amount=value, attributes=dict(key[1]))
+
+    def get_histogram(
+        self, name: str, description: str, labels: Optional[dict[str, str]] = None, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_SECONDS
+    ) -> LatencyHistogram:
+        key: tuple[str, tuple[tuple[str, str], ...]] = self.__register(
+            name=name, description=description, metric_type=self.__HISTOGRAM, labels=labels, buckets=buckets
+        )
+
+        with self.__lock:
+            if key not in self.__histograms:
+                self.__histograms[key] = LatencyHistogram(buckets=buckets)
+
+            return self.__histograms[key]
+
+    def observe(
+        self,
+        name: str,
+        description: str,
+        value: float,
+        labels: Optional[dict[str, str]] = None,
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_SECONDS,
+    ) -> None:
+        histogram: LatencyHistogram = self.get_histogram(name=name, description=description, labels=labels, buckets=buckets)
+        histogram.observe(value=value)
+
+        self.__instruments[name].record(amount=value, attributes=dict(self.__get_labels(name=name, labels=labels)))
+
+    def to_prometheus(self) -> str:
+        # Text exposition format, https://prometheus.io/docs/instrumenting/exposition_formats/
+        with self.__lock:
+            values: dict[tuple[str, tuple[tuple[str, str], ...]], float] = dict(self.__values)
+            histograms: dict[tuple[str, tuple[tuple[str, str], ...]], LatencyHistogram] = dict(self.__histograms)
+
+        lines: List[str] = []
+
+        for name in sorted(self.__types):
+            lines.append(f"# HELP {name} {self.__descriptions[name]}")
+            lines.append(f"# TYPE {name} {self.__types[name]}")
+
+            for (metric_name, labels), value in sorted(values.items()):
+                if metric_name == name:
+                    lines.append(f"{name}{self.__format_labels(labels=labels)} {value}")
+
+            for (metric_name, labels), histogram in sorted(histograms.items(), key=lambda item: item[0]):
+                if metric_name == name:
+                    cumulative_counts: List[int] = histogram.cumulative_counts()
+
+                    for bucket, count in zip(histogram.buckets + (math.inf,), cumulative_counts):
+                        bucket_label: str = "+Inf" if math.isinf(bucket) else str(bucket)
+                        lines.append(f"{name}_bucket{self.__format_labels(labels=labels + (('le', bucket_label),))} {count}")
+
+                    lines.append(f"{name}_sum{self.__format_labels(labels=labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{self.__format_labels(labels=labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def __register(
+        self,
+        name: str,
+        description: str,
+        metric_type: str,
+        labels: Optional[dict[str, str]],
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_SECONDS,
+    ) -> tuple[str, tuple[tuple[str, str], ...]]:
+        with self.__lock:
+            if self.__types.setdefault(name, metric_type) != metric_type:
+                raise ValueError(f"The metric {name} is already registered as a {self.__types[name]}")
+
+            if name not in self.__instruments:
+                self.__descriptions[name] = description
+                self.__label_sets[name] = set()
+                self.__instruments[name] = self.__create_instrument(name=name, description=description, metric_type=metric_type, buckets=buckets)
+
+        return name, self.__get_labels(name=name, labels=labels)
+
+    def __get_labels(self, name: str, labels: Optional[dict[str, str]]) -> tuple[tuple[str, str], ...]:
+        sorted_labels: tuple[tuple[str, str], ...] = tuple(sorted((labels or {}).items()))
+
+        with self.__lock:
+            label_sets: set[tuple[tuple[str, str], ...]] = self.__label_sets[name]
+
+            if sorted_labels in label_sets:
+                return sorted_labels
+
+            if len(label_sets) >= MAX_LABEL_SETS_PER_METRIC:
+                if OVERFLOW_LABELS not in label_sets:
+                    self.__logger.warning(
+                        msg=f"The metric {name} reached {MAX_LABEL_SETS_PER_METRIC} label sets, new ones are folded into an overflow"
+                    )
+                    label_sets.add(OVERFLOW_LABELS)
+
+                return OVERFLOW_LABELS
+
+            label_sets.add(sorted_labels)
+
+            return sorted_labels
+
+    def __create_instrument(self, name: str, description: str, metric_type: str, buckets: tuple[float, ...]) -> Instrument:
+        unit: str = next((unit for suffix, unit in UNITS_BY_SUFFIX.items() if name.endswith(suffix)), "1")
+
+        if metric_type == self.__COUNTER:
+            return self.__meter.create_counter(name=name, unit=unit, description=description)
+
+        if metric_type == self.__GAUGE:
+            return self.__meter.create_gauge(name=name, unit=unit, description=description)
+
+        return self.__meter.create_histogram(name=name, unit=unit, description=description, explicit_bucket_boundaries_advisory=list(buckets))
+
+    @staticmethod
+    def __format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+        if len(labels) == 0:
+            return ""
+
+        escaped_labels: List[str] = [key + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"' for key, value in labels]
+        return "{" + ",".join(escaped_labels) + "}"
+
+
+metrics_registry = MetricsRegistry()
@@ -1,7 +1,10 @@
-from dataclasses import dataclass
+import functools
+from dataclasses import Field, dataclass, fields
 from datetime import datetime
 from enum import Enum
-from typing import final, Optional
+from typing import Any, Callable, final, get_args, List, Optional
+
+import msgpack
 
 
 @final
@@ -24,21 +27,103 @@ class WindDirection(Enum):
     N_NW = "N-NW"
     UNKNOWN = "-"
 
+    @property
+    def bearing(self) -> Optional[float]:
+        return None if self is WindDirection.UNKNOWN else _COMPASS_POINTS.index(self) * _COMPASS_POINT_DEGREES
 
-@dataclass
-@final
+    @staticmethod
+    def from_bearing(bearing: Optional[float]) -> "WindDirection":
+        if bearing is None:
+            return WindDirection.UNKNOWN
+
+        return _COMPASS_POINTS[int(round(bearing / _COMPASS_POINT_DEGREES)) % len(_COMPASS_POINTS)]
+
+
+# Members are declared clockwise from the north
+_COMPASS_POINTS: list[WindDirection] = [direction for direction in WindDirection if direction is not WindDirection.UNKNOWN]
+_COMPASS_POINT_DEGREES: float = 360 / len(_COMPASS_POINTS)
+
+
+@dataclass(slots=True, kw_only=True)
 class Measurement:
-    temperature: Optional[int] = None
-    humidity: Optional[int] = None
-    pressure: Optional[int] = None
-    speed: Optional[int] = None
-    direction: Optional[str] = None
-    amount: Optional[int] = None
+    # Fields shared by every sensor, the sensors add theirs in a sub-class
+    sensor_id: Optional[str] = None
     date_time: Optional[datetime] = None
+    statistics: Optional[dict[str, dict[str, float]]] = None
+
+    def to_dict(self) -> dict[str, int | str | dict[str, dict[str, float]]]:
+        return self.__to_mapping(format_date_time=_to_iso_format)
+
+    def to_msgpack(self) -> bytes:
+        # Dates are packed as msgpack timestamps
+        return msgpack.packb(self.__to_mapping(format_date_time=_with_time_zone), datetime=True)
+
+    def __to_mapping(self, format_date_time: Callable[[datetime], Any]) -> dict[str, Any]:
+        data: dict[str, Any] = {}
+
+        for attribute, key, is_date_time in _get_serialised_fields(measurement_type=type(self)):
+            value: Any = getattr(self, attribute)
+
+            if value is not None:
+                data[key] = format_date_time(value) if is_date_time else value
+
+        return data
+
+
+@final
+@dataclass(slots=True, kw_only=True)
+class AirMeasurement(Measurement):
+    temperature: Optional[float] = None
+    humidity: Optional[float] = None
+    pressure: Optional[float] = None
+
+
+@final
+@dataclass(slots=True, kw_only=True)
+class GroundTemperatureMeasurement(Measurement):
+    temperature: Optional[float] = None
+
+
+@final
+@dataclass(slots=True, kw_only=True)
+class WindMeasurement(Measurement):
+    speed: Optional[float] = None
+    direction: Optional[str] = None
+    bearing: Optional[float] = None
+    direction_confidence: Optional[float] = None
+    gust: Optional[int] = None
+    gust_date_time: Optional[datetime] = None
+    average_speed_2_minutes: Optional[int] = None
+    average_speed_10_minutes: Optional[int] = None
+
+
+@final
+@dataclass(slots=True, kw_only=True)
+class RainfallMeasurement(Measurement):
+    amount: Optional[float] = None
+
+
+@functools.cache
+def _get_serialised_fields(measurement_type: type[Measurement]) -> tuple[tuple[str, str, bool], ...]:
+    # Resolved once per type, the attribute, its camel case key and whether it is a date. The fields of the sensor go first
+    own_fields: List[Field] = [field for field in fields(measurement_type) if field.name not in _BASE_FIELD_NAMES]
+    base_fields: List[Field] = [field for field in fields(measurement_type) if field.name in _BASE_FIELD_NAMES]
+
+    return tuple((field.name, _to_camel_case(key=field.name), datetime in get_args(field.type)) for field in own_fields + base_fields)
+
+
+def _with_time_zone(date_time: datetime) -> datetime:
+    # Dates without a time zone are local ones
+    return date_time if date_time.tzinfo is not None else date_time.astimezone()
+
+
+def _to_iso_format(date_time: datetime) -> str:
+    return _with_time_zone(date_time=date_time).isoformat(timespec="seconds")
+
+
+def _to_camel_case(key: str) -> str:
+    first_word, *other_words = key.split("_")
+    return first_word + "".join(word.capitalize() for word in other_words)
+
 
-    def to_dict(self) -> dict[str, int | str | datetime]:
-        return {
-            ("dateTime" if key == "date_time" else key): value.strftime("%Y-%m-%dT%H:%M:%S") if isinstance(value, datetime) else value
-            for key, value in self.__dict__.items()
-            if value is not None
-        }
+_BASE_FIELD_NAMES: set[str] = {field.name for field in fields(Measurement)}
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from src.clients.clients import ApiClient, DeliveryResult
+from src.metrics.metrics import metrics_registry
+from src.model.models import Measurement
+
+CLOSING_TIMEOUT_SECONDS: int = 10
+JOURNAL_SIZE_LIMIT_BYTES: int = 4 * 1024 * 1024
+
+
+class Outbox(object):
+    __slots__ = [
+        "__path",
+        "__max_entries",
+        "__batch_size",
+        "__seconds_between_drains",
+        "__api_client",
+        "__connection",
+        "__executor",
+        "__pending",
+        "__depth",
+        "__drainer",
+        "__logger",
+    ]
+
+    def __init__(self, path: str, max_entries: int, batch_size: int, seconds_between_drains: int, api_client: ApiClient) -> None:
+        self.__logger = logging.getLogger(name=self.__class__.__name__)
+
+        self.__path = path
+        self.__max_entries = max_entries
+        self.__batch_size = batch_size
+        self.__seconds_between_drains = seconds_between_drains
+        self.__api_client = api_client
+        self.__connection: Optional[sqlite3.Connection] = None
+        # SQLite access is blocking, a single worker keeps it off the event loop and serialises the statements
+        self.__executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+        self.__pending = asyncio.Event()
+        self.__depth = 0
+        self.__drainer: Optional[asyncio.Task] = None
+
+        self.__logger.debug(msg=f"Outbox initialized with the path {self.__path} and a maximum of {self.__max_entries} entries")
+
+    async def open(self) -> None:
+        await self.__run(self.__open)
+        self.__drainer = asyncio.create_task(coro=self.__drain_forever())
+
+        pending_entries: int = await self.__run(self.__count)
+        self.__set_depth(depth=pending_entries)
+        if pending_entries > 0:
+            self.__logger.info(msg=f"Outbox opened with {pending_entries} pending entries")
+            self.__pending.set()
+
+    async def add(self, tuples_endpoint_measurement: List[tuple[str, Measurement]]) -> None:
+        now: float = time.time()
+        rows: List[tuple[str, str, float]] = [
+            (end_point, json.dumps(obj=measurement.to_dict()), now) for end_point, measurement in tuples_endpoint_measurement
+        ]
+
+        evicted_entries: int = await self.__run(self.__insert, rows)
+        self.__set_depth(depth=self.__depth + len(rows) - evicted_entries)
+        if evicted_entries > 0:
+            metrics_registry.increment_counter(
+                name="wsp_outbox_evicted_total", description="Outbox entries evicted before being delivered", value=evicted_entries
+            )
+            self.__logger.warning(msg=f"Outbox full, {evicted_entries} oldest entries were evicted")
+
+        self.__pending.set()
+
+    async def close(self) -> None:
+        if self.__drainer is not None:
+            self.__drainer.cancel()
+            await asyncio.gather(self.__drainer, return_exceptions=True)
+
+            try:
+                await asyncio.wait_for(fut=self.__drain(), timeout=CLOSING_TIMEOUT_SECONDS)
+            except Exception as e:
+                self.__logger.warning(msg="Outbox could not be drained before closing", exc_info=e)
+
+        if self.__connection is not None:
+            await self.__run(self.__connection.close)
+
+        self.__executor.shutdown(wait=True)
+
+    async def __drain_forever(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(fut=self.__pending.wait(), timeout=self.__seconds_between_drains)
+            except asyncio.TimeoutError:
+                pass
+
+            self.__pending.clear()
+
+            try:
+                await self.__drain()
+            except Exception as e:
+                self.__logger.exception(msg="Error draining the outbox", exc_info=e)
+
+    async def __drain(self) -> None:
+        while True:
+            entries: List[tuple[int, str, str]] = await self.__run(self.__fetch, self.__batch_size)
+            if len(entries) == 0:
+                return
+
+            if self.__api_client.bulk_mode:
+                results: List[DeliveryResult] = await self.__deliver(entries=entries)
+            else:
+                # The oldest entry goes first and alone, so nothing else is attempted while the API is unreachable
+                results: List[DeliveryResult] = await self.__deliver(entries=entries[:1])
+                if results[0] is not DeliveryResult.FAILED:
+                    results.extend(await self.__deliver(entries=entries[1:]))
+
+            delivered_ids: List[int] = [entry_id for (entry_id, _, _), result in zip(entries, results) if result is DeliveryResult.DELIVERED]
+            # Rejected entries would be rejected again and block the ones behind them, they are kept aside for inspection
+            rejected_ids: List[int] = [entry_id for (entry_id, _, _), result in zip(entries, results) if result is DeliveryResult.REJECTED]
+            finished_ids: List[int] = delivered_ids + rejected_ids
+
+            await self.__run(self.__delete, delivered_ids)
+            await self.__run(self.__dead_letter, rejected_ids)
+            self.__set_depth(depth=self.__depth - len(finished_ids))
+            self.__logger.debug(msg=f"{len(delivered_ids)} entries drained from the outbox")
+
+            if len(rejected_ids) > 0:
+                metrics_registry.increment_counter(
+                    name="wsp_outbox_rejected_total",
+                    description="Outbox entries rejected by the API and moved to the dead letters",
+                    value=len(rejected_ids),
+                )
+                self.__logger.warning(msg=f"{len(rejected_ids)} entries rejected by the API were moved to the dead letters of the outbox")
+
+            if len(finished_ids) < len(entries):
+                self.__logger.warning(msg="Some entries could not be delivered, they will be retried later")
+                return
+
+    async def __deliver(self, entries: List[tuple[int, str, str]]) -> List[DeliveryResult]:
+        if len(entries) == 0:
+            return []
+
+        return await self.__api_client.add_measurements(
+            tuples_endpoint_payload=[(end_point, json.loads(payload)) for _, end_point, payload in entries]
+        )
+
+    def __set_depth(self, depth: int) -> None:
+        self.__depth = max(depth, 0)
+        metrics_registry.set_gauge(name="wsp_outbox_depth", description="Entries waiting in the outbox to be delivered", value=self.__depth)
+
+    async def __run(self, function: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.__executor, function, *args)
+
+    def __open(self) -> None:
+        directory: str = os.path.dirname(self.__path)
+        if directory:
+            os.makedirs(name=directory, exist_ok=True)
+
+        self.__connection = sqlite3.connect(database=self.__path, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute(f"PRAGMA journal_size_limit={JOURNAL_SIZE_LIMIT_BYTES}")
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, end_point TEXT NOT NULL, payload TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letters ("
+            "id INTEGER PRIMARY KEY, end_point TEXT NOT NULL, payload TEXT NOT NULL, created_at REAL NOT NULL, rejected_at REAL NOT NULL)"
+        )
+        self.__connection.commit()
+
+    def __count(self) -> int:
+        return self.__connection.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def __insert(self, rows: List[tuple[str, str, float]]) -> int:
+        with self.__connection:
+            self.__connection.executemany("INSERT INTO outbox (end_point, payload, created_at) VALUES (?, ?, ?)", rows)
+            cursor: sqlite3.Cursor = self.__connection.execute(
+                "DELETE FROM outbox WHERE id IN (SELECT id FROM outbox ORDER BY id DESC LIMIT -1 OFFSET ?)", (self.__max_entries,)
+            )
+
+        return cursor.rowcount
+
+    def __fetch(self, limit: int) -> List[tuple[int, str, str]]:
+        return self.__connection.execute("SELECT id, end_point, payload FROM outbox ORDER BY id LIMIT ?", (limit,)).fetchall()
+
+    def __delete(self, ids: List[int]) -> None:
+        with self.__connection:
+            self.__connection.executemany("DELETE FROM outbox WHERE id = ?", [(entry_id,) for entry_id in ids])
+
+    def __dead_letter(self, ids: List[int]) -> None:
+        # Moved in a single transaction, bounded as the outbox so rejections cannot fill the disk
+        with self.__connection:
+            self.__connection.executemany(
+                "INSERT INTO dead_letters (id, end_point, payload, created_at, rejected_at) SELECT id, end_point, payload, created_at, ? FROM outbox WHERE id = ?",
+                [(time.time(), entry_id) for entry_id in ids],
+            )
+            self.__connection.executemany("DELETE FROM outbox WHERE id = ?", [(entry_id,) for entry_id in ids])
+            self.__connection.execute(
+                "DELETE FROM dead_letters WHERE id IN (SELECT id FROM dead_letters ORDER BY id DESC LIMIT -1 OFFSET ?)", (self.__max_entries,)
+            )
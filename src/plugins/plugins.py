@@ -0,0 +1,147 @@
+import logging
+import os
+import re
+from dataclasses import dataclass
+from importlib.metadata import EntryPoint, entry_points
+from typing import Callable, List, Optional
+
+from src.config.global_config import global_config
+from src.controllers.controllers import Controller
+from src.services.services import AirMeasurementService, GroundTemperatureService, RainfallService, Service, WindMeasurementService
+
+ENTRY_POINT_GROUP: str = "wsp_sensors.plugins"
+
+logger = logging.getLogger(name="plugins")
+
+
+@dataclass(frozen=True)
+class SensorPlugin:
+    name: str
+    api_endpoint: str
+    socket_event: str
+    # Receives the instance name and returns the service reading the sensor, the service also defines its aggregation
+    create_service: Callable[[str], Service]
+    # Whether the plugin is enabled when SENSOR_PLUGINS is not set
+    enabled_by_default: bool = False
+
+
+def get_instance_option(instance: str, option: str, default: str) -> str:
+    # The options of an instance are environment variables prefixed with its name, i.e. DEEP_PROBE_SENSOR_ID
+    return os.environ.get(f"{re.sub(pattern='[^A-Z0-9]', repl='_', string=instance.upper())}_{option.upper()}", default)
+
+
+def _create_air_measurement_service(instance: str) -> Service:
+    return AirMeasurementService(
+        port=int(get_instance_option(instance=instance, option="port", default=str(global_config.device.bme280_sensor_port))),
+        address=get_instance_option(instance=instance, option="address", default=global_config.device.bme280_sensor_address),
+    )
+
+
+def _create_ground_temperature_service(instance: str) -> Service:
+    sensor_ids: str = get_instance_option(
+        instance=instance, option="sensor_ids", default=",".join(global_config.device.ground_temperature_sensor_ids)
+    )
+    resolution: str = get_instance_option(
+        instance=instance, option="resolution", default=str(global_config.device.ground_temperature_resolution or "")
+    )
+
+    return GroundTemperatureService(
+        sensor_ids=[sensor_id.strip() for sensor_id in sensor_ids.split(",") if sensor_id.strip()], resolution=int(resolution) if resolution else None
+    )
+
+
+def _create_rainfall_service(instance: str) -> Service:
+    return RainfallService(
+        port=int(get_instance_option(instance=instance, option="port", default=str(global_config.device.rain_gauge_port))),
+        bounce_time=global_config.device.rain_gauge_bounce_time,
+    )
+
+
+def _create_wind_measurement_service(instance: str) -> Service:
+    return WindMeasurementService(
+        anemometer_port=int(get_instance_option(instance=instance, option="port", default=str(global_config.device.anemometer_port))),
+        anemometer_bounce_time=global_config.device.anemometer_bounce_time,
+    )
+
+
+_BUILTIN_PLUGINS: List[SensorPlugin] = [
+    SensorPlugin(
+        name="bme280",
+        api_endpoint=global_config.api.add_air_measurement_endpoint,
+        socket_event=global_config.socket.emit_air_measurement_event,
+        create_service=_create_air_measurement_service,
+        enabled_by_default=global_config.device.bme280_sensor_enabled,
+    ),
+    SensorPlugin(
+        name="ground-temperature",
+        api_endpoint=global_config.api.add_ground_temperature_endpoint,
+        socket_event=global_config.socket.emit_ground_temperature_event,
+        create_service=_create_ground_temperature_service,
+        enabled_by_default=global_config.device.ground_temperature_sensor_enabled,
+    ),
+    SensorPlugin(
+        name="rain-gauge",
+        api_endpoint=global_config.api.add_rainfall_measurement_endpoint,
+        socket_event=global_config.socket.emit_rainfall_event,
+        create_service=_create_rainfall_service,
+        enabled_by_default=global_config.device.rain_gauge_enabled,
+    ),
+    SensorPlugin(
+        name="anemometer",
+        api_endpoint=global_config.api.add_wind_measurement_endpoint,
+        socket_event=global_config.socket.emit_wind_measurement_event,
+        create_service=_create_wind_measurement_service,
+        enabled_by_default=global_config.device.anemometer_enabled,
+    ),
+]
+
+_plugins: dict[str, SensorPlugin] = {}
+
+
+def register_plugin(plugin: SensorPlugin) -> None:
+    if plugin.name in _plugins:
+        raise ValueError(f"A sensor plugin named {plugin.name} is already registered")
+
+    _plugins[plugin.name] = plugin
+
+
+def get_plugins() -> dict[str, SensorPlugin]:
+    if len(_plugins) == 0:
+        for plugin in _BUILTIN_PLUGINS:
+            register_plugin(plugin=plugin)
+
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            _load_entry_point(entry_point=entry_point)
+
+    return _plugins
+
+
+def _load_entry_point(entry_point: EntryPoint) -> None:
+    try:
+        plugin: SensorPlugin = entry_point.load()
+
+        if not isinstance(plugin, SensorPlugin):
+            raise TypeError(f"The entry point must refer to a {SensorPlugin.__name__}, {type(plugin).__name__} found")
+
+        register_plugin(plugin=plugin)
+        logger.info(msg=f"Sensor plugin {plugin.name} loaded from {entry_point.value}")
+    except Exception as e:
+        logger.exception(msg=f"Error loading the sensor plugin {entry_point.name} from {entry_point.value}", exc_info=e)
+
+
+def create_controller(plugin_name: str, instance: Optional[str] = None) -> Controller:
+    plugins: dict[str, SensorPlugin] = get_plugins()
+    if plugin_name not in plugins:
+        raise ValueError(f"Unknown sensor plugin {plugin_name}, available ones are {', '.join(sorted(plugins))}")
+
+    plugin: SensorPlugin = plugins[plugin_name]
+    name: str = instance or plugin.name
+
+    return Controller(name=name, service=plugin.create_service(name), api_endpoint=plugin.api_endpoint, socket_event=plugin.socket_event)
+
+
+def get_enabled_instances() -> List[tuple[str, str]]:
+    if len(global_config.device.sensor_plugins) > 0:
+        return global_config.device.sensor_plugins
+
+    return [(plugin.name, plugin.name) for plugin in get_plugins().values() if plugin.enabled_by_default]
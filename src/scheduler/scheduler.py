@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Awaitable, Callable, List
+
+
+def get_next_boundary(period: float, now: float) -> float:
+    return (math.floor(now / period) + 1) * period
+
+
+async def wait_for_next_boundary(period: float) -> float:
+    # Boundaries are multiples of the period on the wall clock, so stations sharing the period fire at the same instants.
+    # Every wait is computed again from the current time, the latency of the previous run never accumulates.
+    boundary: float = get_next_boundary(period=period, now=time.time())
+    await asyncio.sleep(delay=boundary - time.time())
+
+    return boundary
+
+
+class Scheduler(object):
+    __slots__ = ["__tasks", "__logger"]
+
+    def __init__(self) -> None:
+        self.__logger = logging.getLogger(name=self.__class__.__name__)
+        self.__tasks: List[asyncio.Task] = []
+
+    def schedule(self, name: str, period: float, callback: Callable[[], Awaitable[None]]) -> None:
+        if period <= 0:
+            raise ValueError(f"The period of {name} must be positive, {period} given")
+
+        self.__tasks.append(asyncio.create_task(coro=self.__run_periodically(name=name, period=period, callback=callback), name=name))
+        self.__logger.debug(msg=f"{name} scheduled every {period} seconds")
+
+    async def __run_periodically(self, name: str, period: float, callback: Callable[[], Awaitable[None]]) -> None:
+        # The first run is not aligned so there are readings as soon as the application starts
+        await self.__run(name=name, period=period, callback=callback)
+
+        while True:
+            await wait_for_next_boundary(period=period)
+            await self.__run(name=name, period=period, callback=callback)
+
+    async def __run(self, name: str, period: float, callback: Callable[[], Awaitable[None]]) -> None:
+        started_at: float = time.monotonic()
+
+        try:
+            await callback()
+        except Exception as e:
+            self.__logger.exception(msg=f"Error running the scheduled task {name}", exc_info=e)
+
+        elapsed_seconds: float = time.monotonic() - started_at
+        if elapsed_seconds > period:
+            self.__logger.warning(msg=f"{name} took {elapsed_seconds:.3f} seconds, the boundaries in between are skipped")
+
+    async def close(self) -> None:
+        for task in self.__tasks:
+            task.cancel()
+
+        await asyncio.gather(*self.__tasks, return_exceptions=True)
+        self.__tasks.clear()
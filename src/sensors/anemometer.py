@@ -1,34 +1,45 @@
 import math
 import time
+from typing import List, Optional
 
-from gpiozero import Button
+from src.sensors.gusts import GustSummary, WindGustEngine
+from src.sensors.interrupts import InterruptBridge
 
 
 class Anemometer(object):
-    __slots__ = ["__spin_count", "__start_time", "__sensor"]
+    __slots__ = ["__spin_count", "__start_time", "__sensor", "__gust_engine"]
 
     __SENSOR_RADIUS_CM: float = 9.0
     __SENSOR_CIRCUMFERENCE_LONG_KM: float = (2 * math.pi) * __SENSOR_RADIUS_CM / 100000.0
     __SENSOR_ADJUSTMENT: float = 1.18
+    # km/h for a pulse per second, two pulses per rotation
+    SPEED_PER_PULSE_RATE: float = __SENSOR_CIRCUMFERENCE_LONG_KM / 2.0 * 3600 * __SENSOR_ADJUSTMENT
 
-    def __init__(self, port_number: int) -> None:
+    def __init__(self, port_number: int, bounce_time: Optional[float] = None) -> None:
         self.__spin_count = 0
-        self.__start_time = time.time()
-        self.__sensor = Button(pin=port_number)
-        self.__sensor.when_pressed = self.__spin
+        self.__start_time = time.monotonic()
+        self.__gust_engine = WindGustEngine(speed_per_pulse_rate=self.SPEED_PER_PULSE_RATE)
+        self.__sensor = InterruptBridge(port_number=port_number, bounce_time=bounce_time, on_edges=self.__spin)
 
-    def __spin(self) -> None:
-        self.__spin_count = self.__spin_count + 1
+    def __spin(self, edges: List[float]) -> None:
+        self.__spin_count = self.__spin_count + len(edges)
+        self.__gust_engine.add_pulses(timestamps=edges)
 
     def get_speed(self) -> float:
         try:
             current_count: int = self.__spin_count
-            elapsed_seconds: float = time.time() - self.__start_time
+            elapsed_seconds: float = time.monotonic() - self.__start_time
 
             return self.__calculate_speed(current_spin_count=current_count, elapsed_seconds=elapsed_seconds)
         finally:
             self.__spin_count = 0
-            self.__start_time = time.time()
+            self.__start_time = time.monotonic()
+
+    def get_gust_summary(self) -> GustSummary:
+        try:
+            return self.__gust_engine.get_summary()
+        finally:
+            self.__gust_engine.reset_peak_gust()
 
     def __calculate_speed(self, current_spin_count: int, elapsed_seconds: float) -> float:
         rotations: float = current_spin_count / 2.0
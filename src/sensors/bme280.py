@@ -0,0 +1,257 @@
+import logging
+import struct
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from src.metrics.metrics import metrics_registry
+
+if TYPE_CHECKING:
+    from smbus2 import SMBus
+
+# Registers and values from the BME280 datasheet, https://www.bosch-sensortec.com/products/environmental-sensors/humidity-sensors-bme280/
+_CHIP_ID_REGISTER: int = 0xD0
+_CHIP_ID: int = 0x60
+_CALIBRATION_TP_REGISTER: int = 0x88
+_CALIBRATION_TP_LENGTH: int = 26
+_CALIBRATION_H_REGISTER: int = 0xE1
+_CALIBRATION_H_LENGTH: int = 7
+_CTRL_HUM_REGISTER: int = 0xF2
+_STATUS_REGISTER: int = 0xF3
+_CTRL_MEAS_REGISTER: int = 0xF4
+_CONFIG_REGISTER: int = 0xF5
+_DATA_REGISTER: int = 0xF7
+_DATA_LENGTH: int = 8
+_STATUS_MEASURING: int = 0x08
+_SLEEP_MODE: int = 0b00
+_FORCED_MODE: int = 0b01
+_NORMAL_MODE: int = 0b11
+_SKIPPED_TEMPERATURE_OR_PRESSURE: int = 0x80000
+_SKIPPED_HUMIDITY: int = 0x8000
+_MAXIMUM_STATUS_POLLS: int = 10
+
+# Register values by oversampling, filter coefficient and standby milliseconds
+_OVERSAMPLING_SETTINGS: dict[int, int] = {0: 0b000, 1: 0b001, 2: 0b010, 4: 0b011, 8: 0b100, 16: 0b101}
+_FILTER_SETTINGS: dict[int, int] = {0: 0b000, 2: 0b001, 4: 0b010, 8: 0b011, 16: 0b100}
+_STANDBY_SETTINGS: dict[float, int] = {0.5: 0b000, 62.5: 0b001, 125: 0b010, 250: 0b011, 500: 0b100, 1000: 0b101, 10: 0b110, 20: 0b111}
+
+
+@dataclass(frozen=True)
+class Bme280Calibration:
+    dig_t1: int
+    dig_t2: int
+    dig_t3: int
+    dig_p1: int
+    dig_p2: int
+    dig_p3: int
+    dig_p4: int
+    dig_p5: int
+    dig_p6: int
+    dig_p7: int
+    dig_p8: int
+    dig_p9: int
+    dig_h1: int
+    dig_h2: int
+    dig_h3: int
+    dig_h4: int
+    dig_h5: int
+    dig_h6: int
+
+    @staticmethod
+    def from_registers(tp_block: bytes, h_block: bytes) -> "Bme280Calibration":
+        t1, t2, t3, p1, p2, p3, p4, p5, p6, p7, p8, p9, _, h1 = struct.unpack("<HhhHhhhhhhhhBB", tp_block)
+        h2, h3, e4, e5, e6, h6 = struct.unpack("<hBbBbb", h_block)
+
+        # H4 and H5 are 12 bits values sharing the nibbles of 0xE5
+        return Bme280Calibration(
+            dig_t1=t1,
+            dig_t2=t2,
+            dig_t3=t3,
+            dig_p1=p1,
+            dig_p2=p2,
+            dig_p3=p3,
+            dig_p4=p4,
+            dig_p5=p5,
+            dig_p6=p6,
+            dig_p7=p7,
+            dig_p8=p8,
+            dig_p9=p9,
+            dig_h1=h1,
+            dig_h2=h2,
+            dig_h3=h3,
+            dig_h4=(e4 << 4) | (e5 & 0x0F),
+            dig_h5=(e6 << 4) | (e5 >> 4),
+            dig_h6=h6,
+        )
+
+
+@dataclass(frozen=True)
+class Bme280Reading:
+    temperature: Optional[float]
+    pressure: Optional[float]
+    humidity: Optional[float]
+
+
+def compensate(raw_data: bytes, calibration: Bme280Calibration) -> Bme280Reading:
+    # Floating point formulas of the datasheet, section 8.1. Temperature in ºC, pressure in hPa and humidity in %
+    adc_p: int = (raw_data[0] << 12) | (raw_data[1] << 4) | (raw_data[2] >> 4)
+    adc_t: int = (raw_data[3] << 12) | (raw_data[4] << 4) | (raw_data[5] >> 4)
+    adc_h: int = (raw_data[6] << 8) | raw_data[7]
+
+    if adc_t == _SKIPPED_TEMPERATURE_OR_PRESSURE:
+        # Pressure and humidity depend on the temperature
+        return Bme280Reading(temperature=None, pressure=None, humidity=None)
+
+    var1: float = (adc_t / 16384.0 - calibration.dig_t1 / 1024.0) * calibration.dig_t2
+    var2: float = (adc_t / 131072.0 - calibration.dig_t1 / 8192.0) ** 2 * calibration.dig_t3
+    t_fine: float = var1 + var2
+
+    return Bme280Reading(
+        temperature=t_fine / 5120.0,
+        pressure=None if adc_p == _SKIPPED_TEMPERATURE_OR_PRESSURE else _compensate_pressure(adc_p=adc_p, t_fine=t_fine, calibration=calibration),
+        humidity=None if adc_h == _SKIPPED_HUMIDITY else _compensate_humidity(adc_h=adc_h, t_fine=t_fine, calibration=calibration),
+    )
+
+
+def _compensate_pressure(adc_p: int, t_fine: float, calibration: Bme280Calibration) -> Optional[float]:
+    var1: float = t_fine / 2.0 - 64000.0
+    var2: float = var1 * var1 * calibration.dig_p6 / 32768.0
+    var2 = var2 + var1 * calibration.dig_p5 * 2.0
+    var2 = var2 / 4.0 + calibration.dig_p4 * 65536.0
+    var1 = (calibration.dig_p3 * var1 * var1 / 524288.0 + calibration.dig_p2 * var1) / 524288.0
+    var1 = (1.0 + var1 / 32768.0) * calibration.dig_p1
+
+    if var1 == 0:
+        return None
+
+    pressure: float = 1048576.0 - adc_p
+    pressure = (pressure - var2 / 4096.0) * 6250.0 / var1
+    var1 = calibration.dig_p9 * pressure * pressure / 2147483648.0
+    var2 = pressure * calibration.dig_p8 / 32768.0
+
+    return (pressure + (var1 + var2 + calibration.dig_p7) / 16.0) / 100.0
+
+
+def _compensate_humidity(adc_h: int, t_fine: float, calibration: Bme280Calibration) -> float:
+    humidity: float = t_fine - 76800.0
+    humidity = (adc_h - (calibration.dig_h4 * 64.0 + calibration.dig_h5 / 16384.0 * humidity)) * (
+        calibration.dig_h2 / 65536.0 * (1.0 + calibration.dig_h6 / 67108864.0 * humidity * (1.0 + calibration.dig_h3 / 67108864.0 * humidity))
+    )
+    humidity = humidity * (1.0 - calibration.dig_h1 * humidity / 524288.0)
+
+    return min(max(humidity, 0.0), 100.0)
+
+
+class Bme280(object):
+    FORCED_MODE: str = "forced"
+    NORMAL_MODE: str = "normal"
+
+    __slots__ = [
+        "__bus",
+        "__address",
+        "__mode",
+        "__ctrl_hum",
+        "__ctrl_meas",
+        "__config",
+        "__measurement_seconds",
+        "__calibration",
+        "__logger",
+    ]
+
+    def __init__(
+        self,
+        bus: "SMBus",
+        address: int,
+        mode: str = FORCED_MODE,
+        temperature_oversampling: int = 1,
+        pressure_oversampling: int = 1,
+        humidity_oversampling: int = 1,
+        filter_coefficient: int = 0,
+        standby_time: float = 1000,
+    ) -> None:
+        if mode not in [self.FORCED_MODE, self.NORMAL_MODE]:
+            raise ValueError(f"Unknown BME280 mode {mode}")
+
+        for oversampling in [temperature_oversampling, pressure_oversampling, humidity_oversampling]:
+            if oversampling not in _OVERSAMPLING_SETTINGS:
+                raise ValueError(f"Invalid BME280 oversampling {oversampling}, valid ones are {', '.join(map(str, _OVERSAMPLING_SETTINGS))}")
+
+        # Skipping the temperature leaves no t_fine to compensate the pressure and the humidity with
+        if temperature_oversampling == 0:
+            raise ValueError("The BME280 temperature measurement can not be skipped, its oversampling must be 1 or more")
+
+        if filter_coefficient not in _FILTER_SETTINGS:
+            raise ValueError(f"Invalid BME280 filter coefficient {filter_coefficient}, valid ones are {', '.join(map(str, _FILTER_SETTINGS))}")
+
+        if standby_time not in _STANDBY_SETTINGS:
+            raise ValueError(f"Invalid BME280 standby time {standby_time}, valid ones are {', '.join(map(str, _STANDBY_SETTINGS))}")
+
+        self.__logger = logging.getLogger(name=self.__class__.__name__)
+
+        self.__bus = bus
+        self.__address = address
+        self.__mode = mode
+        self.__ctrl_hum = _OVERSAMPLING_SETTINGS[humidity_oversampling]
+        self.__ctrl_meas = (_OVERSAMPLING_SETTINGS[temperature_oversampling] << 5) | (_OVERSAMPLING_SETTINGS[pressure_oversampling] << 2)
+        self.__config = (_STANDBY_SETTINGS[standby_time] << 5) | (_FILTER_SETTINGS[filter_coefficient] << 2)
+        # Maximum measurement time of the datasheet, appendix 9.1
+        self.__measurement_seconds = (
+            1.25
+            + 2.3 * temperature_oversampling
+            + (2.3 * pressure_oversampling + 0.575 if pressure_oversampling > 0 else 0)
+            + (2.3 * humidity_oversampling + 0.575 if humidity_oversampling > 0 else 0)
+        ) / 1000
+        self.__calibration: Optional[Bme280Calibration] = None
+
+    def configure(self) -> None:
+        chip_id: int = self.__bus.read_byte_data(self.__address, _CHIP_ID_REGISTER)
+        if chip_id != _CHIP_ID:
+            raise ValueError(f"Device at {hex(self.__address)} is not a BME280, chip id {hex(chip_id)} found")
+
+        # Both calibration blocks are read in a single transfer each and compensated from memory afterwards
+        self.__calibration = Bme280Calibration.from_registers(
+            tp_block=bytes(self.__bus.read_i2c_block_data(self.__address, _CALIBRATION_TP_REGISTER, _CALIBRATION_TP_LENGTH)),
+            h_block=bytes(self.__bus.read_i2c_block_data(self.__address, _CALIBRATION_H_REGISTER, _CALIBRATION_H_LENGTH)),
+        )
+
+        # The configuration is only honoured in sleep mode and ctrl_hum only applies after ctrl_meas is written
+        self.__bus.write_byte_data(self.__address, _CTRL_MEAS_REGISTER, self.__ctrl_meas | _SLEEP_MODE)
+        self.__bus.write_byte_data(self.__address, _CONFIG_REGISTER, self.__config)
+        self.__bus.write_byte_data(self.__address, _CTRL_HUM_REGISTER, self.__ctrl_hum)
+
+        if self.__mode == self.NORMAL_MODE:
+            # The chip keeps measuring on its own, every read takes the last result without triggering anything
+            self.__bus.write_byte_data(self.__address, _CTRL_MEAS_REGISTER, self.__ctrl_meas | _NORMAL_MODE)
+
+        self.__logger.debug(msg=f"BME280 at {hex(self.__address)} configured in {self.__mode} mode")
+
+    def read(self) -> Bme280Reading:
+        if self.__calibration is None:
+            self.configure()
+
+        started_at: float = time.perf_counter()
+
+        if self.__mode == self.FORCED_MODE:
+            self.__bus.write_byte_data(self.__address, _CTRL_MEAS_REGISTER, self.__ctrl_meas | _FORCED_MODE)
+            time.sleep(self.__measurement_seconds)
+            self.__wait_for_measurement()
+
+        raw_data: bytes = bytes(self.__bus.read_i2c_block_data(self.__address, _DATA_REGISTER, _DATA_LENGTH))
+        metrics_registry.observe(
+            name="wsp_bme280_read_duration_seconds",
+            description="Time taken by the BME280 reads, bus transfers included",
+            value=time.perf_counter() - started_at,
+            labels={"address": hex(self.__address)},
+        )
+
+        return compensate(raw_data=raw_data, calibration=self.__calibration)
+
+    def __wait_for_measurement(self) -> None:
+        # The maximum time is usually enough, the status is only polled a few times when it is not
+        for _ in range(_MAXIMUM_STATUS_POLLS):
+            if not self.__bus.read_byte_data(self.__address, _STATUS_REGISTER) & _STATUS_MEASURING:
+                return
+
+            time.sleep(self.__measurement_seconds / _MAXIMUM_STATUS_POLLS)
+
+        raise TimeoutError(f"BME280 at {hex(self.__address)} did not finish the measurement")
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from src.config.global_config import global_config
+from src.metrics.metrics import metrics_registry
+
+T = TypeVar("T")
+
+
+class BusExecutor(object):
+    __slots__ = ["__name", "__timeout", "__executor", "__logger"]
+
+    def __init__(self, name: str, timeout: float) -> None:
+        self.__logger = logging.getLogger(name=self.__class__.__name__)
+
+        self.__name = name
+        self.__timeout = timeout
+        # A single worker serialises the access to the bus, devices sharing it never talk at the same time
+        self.__executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"bus-{name}")
+        # Both series of the bus are published from the start, not only once the first read or timeout happens
+        metrics_registry.get_histogram(
+            name="wsp_bus_read_duration_seconds", description="Time taken by the reads on a sensor bus", labels={"bus": name}
+        )
+        metrics_registry.increment_counter(
+            name="wsp_bus_read_timeouts_total", description="Reads on a sensor bus that timed out", value=0, labels={"bus": name}
+        )
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    async def run(self, function: Callable[[], T]) -> T:
+        try:
+            return await asyncio.wait_for(
+                fut=asyncio.get_running_loop().run_in_executor(self.__executor, self.__timed, function), timeout=self.__timeout
+            )
+        except asyncio.TimeoutError:
+            metrics_registry.increment_counter(
+                name="wsp_bus_read_timeouts_total", description="Reads on a sensor bus that timed out", labels={"bus": self.__name}
+            )
+            self.__logger.warning(msg=f"Read on the bus {self.__name} did not finish in {self.__timeout} seconds")
+            raise
+
+    def __timed(self, function: Callable[[], T]) -> T:
+        started_at: float = time.perf_counter()
+
+        try:
+            return function()
+        finally:
+            metrics_registry.observe(
+                name="wsp_bus_read_duration_seconds",
+                description="Time taken by the reads on a sensor bus",
+                value=time.perf_counter() - started_at,
+                labels={"bus": self.__name},
+            )
+
+    def close(self) -> None:
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+
+_bus_executors: dict[str, BusExecutor] = {}
+
+
+def get_bus_executor(name: str) -> BusExecutor:
+    if name not in _bus_executors:
+        _bus_executors[name] = BusExecutor(name=name, timeout=global_config.device.sensor_read_timeout)
+
+    return _bus_executors[name]
+
+
+def close_bus_executors() -> None:
+    for bus_executor in _bus_executors.values():
+        bus_executor.close()
+
+    _bus_executors.clear()
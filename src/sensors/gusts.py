@@ -0,0 +1,116 @@
+import time
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+
+
+@dataclass
+class GustSummary:
+    gust: float
+    gust_date_time: Optional[datetime]
+    average_speed_2_minutes: float
+    average_speed_10_minutes: float
+
+
+class WindGustEngine(object):
+    # WMO guidance: gusts are the highest 3-second running mean, sustained winds are 2 and 10-minute means.
+    # Pulses are counted in 0.25 seconds bins kept in a ring, the running sums of every window are updated when a bin
+    # closes, so each pulse costs one increment and each bin a constant amount of work.
+    __BIN_SECONDS: float = 0.25
+    __GUST_BINS: int = 12
+    __TWO_MINUTES_BINS: int = 480
+    __TEN_MINUTES_BINS: int = 2400
+    __RING_SIZE: int = __TEN_MINUTES_BINS + 1
+
+    __slots__ = [
+        "__speed_per_pulse_rate",
+        "__bins",
+        "__current_bin",
+        "__closed_bins",
+        "__gust_pulses",
+        "__two_minutes_pulses",
+        "__ten_minutes_pulses",
+        "__peak_gust_pulses",
+        "__peak_gust_bin",
+    ]
+
+    def __init__(self, speed_per_pulse_rate: float) -> None:
+        # Speed corresponding to one pulse per second
+        self.__speed_per_pulse_rate = speed_per_pulse_rate
+        self.__bins = array("I", [0]) * self.__RING_SIZE
+        self.__current_bin = self.__get_bin(timestamp=time.monotonic())
+        self.__closed_bins = 0
+        self.__gust_pulses = 0
+        self.__two_minutes_pulses = 0
+        self.__ten_minutes_pulses = 0
+        self.__peak_gust_pulses = 0
+        self.__peak_gust_bin: Optional[int] = None
+
+    def add_pulses(self, timestamps: List[float]) -> None:
+        for timestamp in timestamps:
+            bin_index: int = self.__get_bin(timestamp=timestamp)
+
+            if bin_index > self.__current_bin:
+                self.__advance(bin_index=bin_index)
+
+            self.__bins[self.__current_bin % self.__RING_SIZE] += 1
+
+    def get_summary(self) -> GustSummary:
+        self.__advance(bin_index=self.__get_bin(timestamp=time.monotonic()))
+        # Worked out on every summary, the wall clock of a device without RTC jumps once NTP synchronises it
+        wall_clock_offset: float = time.time() - time.monotonic()
+
+        return GustSummary(
+            gust=self.__get_speed(pulses=self.__peak_gust_pulses, bins=self.__GUST_BINS),
+            gust_date_time=(
+                datetime.fromtimestamp((self.__peak_gust_bin + 1) * self.__BIN_SECONDS + wall_clock_offset, tz=timezone.utc)
+                if self.__peak_gust_bin is not None
+                else None
+            ),
+            average_speed_2_minutes=self.__get_speed(pulses=self.__two_minutes_pulses, bins=min(self.__closed_bins, self.__TWO_MINUTES_BINS)),
+            average_speed_10_minutes=self.__get_speed(pulses=self.__ten_minutes_pulses, bins=min(self.__closed_bins, self.__TEN_MINUTES_BINS)),
+        )
+
+    def reset_peak_gust(self) -> None:
+        self.__peak_gust_pulses = 0
+        self.__peak_gust_bin = None
+
+    def __get_bin(self, timestamp: float) -> int:
+        return int(timestamp / self.__BIN_SECONDS)
+
+    def __get_speed(self, pulses: int, bins: int) -> float:
+        return pulses / (bins * self.__BIN_SECONDS) * self.__speed_per_pulse_rate if bins > 0 else 0.0
+
+    def __advance(self, bin_index: int) -> None:
+        if bin_index - self.__current_bin > self.__RING_SIZE:
+            # After a long calm every window is empty, the following bins would only lower the running sums
+            self.__close_current_bin()
+            self.__bins = array("I", [0]) * self.__RING_SIZE
+            self.__gust_pulses = 0
+            self.__two_minutes_pulses = 0
+            self.__ten_minutes_pulses = 0
+            self.__closed_bins = self.__TEN_MINUTES_BINS
+            self.__current_bin = bin_index
+
+            return
+
+        while self.__current_bin < bin_index:
+            self.__close_current_bin()
+            self.__current_bin += 1
+            # The slot of the new bin held the one that has just left the longest window
+            self.__bins[self.__current_bin % self.__RING_SIZE] = 0
+
+    def __close_current_bin(self) -> None:
+        bins: array = self.__bins
+        current_bin: int = self.__current_bin
+        pulses: int = bins[current_bin % self.__RING_SIZE]
+
+        self.__gust_pulses += pulses - bins[(current_bin - self.__GUST_BINS) % self.__RING_SIZE]
+        self.__two_minutes_pulses += pulses - bins[(current_bin - self.__TWO_MINUTES_BINS) % self.__RING_SIZE]
+        self.__ten_minutes_pulses += pulses - bins[(current_bin - self.__TEN_MINUTES_BINS) % self.__RING_SIZE]
+        self.__closed_bins = min(self.__closed_bins + 1, self.__TEN_MINUTES_BINS)
+
+        if self.__gust_pulses > self.__peak_gust_pulses:
+            self.__peak_gust_pulses = self.__gust_pulses
+            self.__peak_gust_bin = current_bin
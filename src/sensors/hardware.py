@@ -0,0 +1,94 @@
+from typing import TYPE_CHECKING, Any, List, Optional, TypeVar
+
+from src.config.global_config import global_config
+
+if TYPE_CHECKING:
+    from gpiozero import MCP3008, Button
+    from smbus2 import SMBus
+    from w1thermsensor import AsyncW1ThermSensor
+
+    from src.sensors.interrupts import InterruptBridge
+
+T = TypeVar("T")
+
+
+class Hardware(object):
+    # Devices of the Raspberry Pi, every driver is imported when the first sensor using it is created.
+    # The hardware owns the devices it creates and closes them with the bridges listening to them
+    __slots__ = ["__bridges", "__devices"]
+
+    def __init__(self) -> None:
+        self.__bridges: List["InterruptBridge"] = []
+        self.__devices: List[Any] = []
+
+    def open_i2c_bus(self, port: int) -> "SMBus":
+        import smbus2
+
+        return self._add_device(device=smbus2.SMBus(bus=port))
+
+    def get_w1_sensors(self) -> List["AsyncW1ThermSensor"]:
+        from w1thermsensor import AsyncW1ThermSensor
+
+        # 1-Wire probes are read through sysfs files opened on every reading, there is nothing to close
+        return AsyncW1ThermSensor.get_available_sensors()
+
+    def create_button(self, pin: int, bounce_time: Optional[float]) -> "Button":
+        from gpiozero import Button
+
+        return self._add_device(device=Button(pin=pin, bounce_time=bounce_time))
+
+    def create_mcp3008(self, channel: int) -> "MCP3008":
+        from gpiozero import MCP3008
+
+        return self._add_device(device=MCP3008(channel=channel))
+
+    def add_bridge(self, bridge: "InterruptBridge") -> None:
+        self.__bridges.append(bridge)
+
+    def close(self) -> None:
+        # The bridges stop dispatching edges before the pins they listen to are released
+        for bridge in self.__bridges:
+            bridge.close()
+
+        for device in reversed(self.__devices):
+            device.close()
+
+        self.__bridges.clear()
+        self.__devices.clear()
+
+    def _add_device(self, device: T) -> T:
+        self.__devices.append(device)
+
+        return device
+
+
+_hardware: Optional[Hardware] = None
+
+
+def get_hardware() -> Hardware:
+    global _hardware
+
+    if _hardware is None:
+        if global_config.environment.is_simulation:
+            from src.simulator.simulator import SimulatedHardware
+
+            _hardware = SimulatedHardware()
+        else:
+            _hardware = Hardware()
+
+    return _hardware
+
+
+def set_hardware(hardware: Hardware) -> None:
+    # Replaces the devices the sensors are created with, it must be called before the sensors are created
+    global _hardware
+
+    _hardware = hardware
+
+
+def close_hardware() -> None:
+    global _hardware
+
+    if _hardware is not None:
+        _hardware.close()
+        _hardware = None
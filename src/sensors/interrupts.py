@@ -0,0 +1,52 @@
+import asyncio
+import threading
+import time
+from typing import Callable, List, Optional
+
+from src.sensors.hardware import Hardware, get_hardware
+
+
+class InterruptBridge(object):
+    __slots__ = ["__sensor", "__loop", "__on_edges", "__lock", "__pending_edges", "__dispatch_scheduled"]
+
+    def __init__(self, port_number: int, bounce_time: Optional[float], on_edges: Callable[[List[float]], None]) -> None:
+        self.__loop = asyncio.get_running_loop()
+        self.__on_edges = on_edges
+        self.__lock = threading.Lock()
+        self.__pending_edges: List[float] = []
+        self.__dispatch_scheduled = False
+
+        # gpiozero is slow to import, it is only loaded once a sensor is attached to a pin
+        hardware: Hardware = get_hardware()
+        self.__sensor = hardware.create_button(pin=port_number, bounce_time=bounce_time)
+        self.__sensor.when_pressed = self.__capture_edge
+        hardware.add_bridge(bridge=self)
+
+    def __capture_edge(self) -> None:
+        # Called from the gpiozero thread, only the timestamp is recorded and a single dispatch per burst is scheduled in the loop
+        timestamp: float = time.monotonic()
+
+        with self.__lock:
+            self.__pending_edges.append(timestamp)
+
+            if self.__dispatch_scheduled:
+                return
+
+            self.__dispatch_scheduled = True
+
+        self.__loop.call_soon_threadsafe(self.__dispatch_edges)
+
+    def __dispatch_edges(self) -> None:
+        with self.__lock:
+            edges: List[float] = self.__pending_edges
+            self.__pending_edges = []
+            self.__dispatch_scheduled = False
+
+        self.__on_edges(edges)
+
+    def close(self) -> None:
+        # The button belongs to the hardware, which closes it afterwards. Edges from now on are not dispatched to the loop
+        self.__sensor.when_pressed = None
+
+        with self.__lock:
+            self.__pending_edges = []
@@ -1,17 +1,57 @@
 import logging
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Optional
 
-from gpiozero import MCP3008
-
+from src.metrics.metrics import metrics_registry
 from src.model.models import WindDirection
+from src.sensors.hardware import get_hardware
+
+
+def _build_lookup_table(sorted_table: list[tuple[float, WindDirection]], maximum_value: float) -> tuple[WindDirection, ...]:
+    # Index i resolves the value i / 10, the direction is the one with the highest table value not above it
+    lookup_table: list[WindDirection] = []
+
+    for index in range(int(round(maximum_value * 10)) + 1):
+        direction: WindDirection = WindDirection.UNKNOWN
+
+        for gpio_item_value, item_direction in sorted_table:
+            if index < round(gpio_item_value * 10):
+                break
+
+            direction = item_direction
+
+        lookup_table.append(direction)
+
+    return tuple(lookup_table)
+
+
+@dataclass
+class VaneReading:
+    bearing: Optional[float]
+    confidence: float
 
 
 class Vane(object):
-    __slots__ = ["__mcp_chip", "__logger"]
+    MEDIAN_FILTER: str = "median"
+    TRIMMED_MEAN_FILTER: str = "trimmed_mean"
+
+    __slots__ = [
+        "__mcp_chip",
+        "__logger",
+        "__samples_per_reading",
+        "__filter",
+        "__hysteresis",
+        "__last_direction",
+        "__total_reads",
+        "__total_reading_seconds",
+    ]
 
     __CHANNEL: int = 0
-    __VOLTAGE_IN: float = 3.3
-    __UNKNOWN_WIND_DIRECTION: str = "-"
-    __VANE_ANGLES_AND_DIRECTIONS_TABLE: list[tuple[float, str]] = sorted(
+    VOLTAGE_IN: float = 3.3
+    __TRIMMED_PROPORTION: float = 0.2
+    VANE_ANGLES_AND_DIRECTIONS_TABLE: list[tuple[float, WindDirection]] = sorted(
         [
             (0.4, WindDirection.N),
             (1.4, WindDirection.N_NE),
@@ -32,29 +72,74 @@ class Vane(object):
         ],
         key=lambda x: x[0],
     )
+    # GPIO values are rounded to one decimal, so every possible value is resolved once instead of scanning the table per read
+    __LOOKUP_TABLE: tuple[WindDirection, ...] = _build_lookup_table(sorted_table=VANE_ANGLES_AND_DIRECTIONS_TABLE, maximum_value=VOLTAGE_IN)
+
+    def __init__(self, samples_per_reading: int = 1, filter_name: str = MEDIAN_FILTER, hysteresis: float = 0.0) -> None:
+        if samples_per_reading < 1:
+            raise ValueError(f"At least one sample per reading is needed, {samples_per_reading} given")
+
+        if filter_name not in [self.MEDIAN_FILTER, self.TRIMMED_MEAN_FILTER]:
+            raise ValueError(f"Unknown vane filter {filter_name}")
 
-    def __init__(self) -> None:
         self.__logger = logging.getLogger(name=self.__class__.__name__)
-        self.__mcp_chip = MCP3008(channel=self.__CHANNEL)
+        # gpiozero is slow to import, it is only loaded once the chip is used
+        self.__mcp_chip = get_hardware().create_mcp3008(channel=self.__CHANNEL)
+        self.__samples_per_reading = samples_per_reading
+        self.__filter = filter_name
+        # Volts the value must move past a boundary before the direction changes
+        self.__hysteresis = hysteresis
+        self.__last_direction: Optional[WindDirection] = None
+        self.__total_reads = 0
+        self.__total_reading_seconds = 0.0
+
+    @property
+    def reads_per_second(self) -> float:
+        return self.__total_reads / self.__total_reading_seconds if self.__total_reading_seconds > 0 else 0.0
+
+    def get_reading(self) -> VaneReading:
+        started_at: float = time.perf_counter()
+        mcp_values: list[float] = [self.__mcp_chip.value for _ in range(self.__samples_per_reading)]
+        elapsed_seconds: float = time.perf_counter() - started_at
+
+        self.__total_reads += len(mcp_values)
+        self.__total_reading_seconds += elapsed_seconds
+        metrics_registry.set_gauge(
+            name="wsp_vane_reads_per_second", description="ADC reads of the vane per second spent reading it", value=self.reads_per_second
+        )
+
+        mcp_value: float = self.__filter_values(values=mcp_values)
+        direction: WindDirection = self.__apply_hysteresis(value=mcp_value, direction=self.__get_direction_by_mcp_value(value=mcp_value))
+        confidence: float = sum(1 for value in mcp_values if self.__get_direction_by_mcp_value(value=value) is direction) / len(mcp_values)
+        self.__last_direction = direction
 
-    def get_direction(self) -> str:
-        mcp_value: float = self.__mcp_chip.value
-        gpio_value: float = round(mcp_value * self.__VOLTAGE_IN, 1)
+        self.__logger.debug(
+            msg=f"MCP reading {mcp_value} from {len(mcp_values)} samples in {elapsed_seconds * 1000:.2f} ms,"
+            f" direction {direction.value} with confidence {confidence:.2f}."
+        )
 
-        self.__logger.debug(msg=f"MCP reading {mcp_value}, GPIO value {gpio_value}.")
+        return VaneReading(bearing=direction.bearing, confidence=confidence)
 
-        return self.__get_direction_by_gpio_value(value=gpio_value)
+    def __filter_values(self, values: list[float]) -> float:
+        if self.__filter == self.MEDIAN_FILTER or len(values) < 3:
+            return statistics.median(values)
 
-    def __get_direction_by_gpio_value(self, value: float) -> str:
-        last_direction: str = self.__UNKNOWN_WIND_DIRECTION
+        trimmed_count: int = int(len(values) * self.__TRIMMED_PROPORTION)
+        return statistics.mean(sorted(values)[trimmed_count : len(values) - trimmed_count])
 
-        for gpio_item_value, direction in self.__VANE_ANGLES_AND_DIRECTIONS_TABLE:
-            gpio_item_value: float
-            direction: WindDirection
+    def __apply_hysteresis(self, value: float, direction: WindDirection) -> WindDirection:
+        if self.__hysteresis <= 0 or self.__last_direction is None or direction is self.__last_direction:
+            return direction
 
-            if value < gpio_item_value:
-                return last_direction
+        # The previous direction is kept while it is still reachable within the hysteresis band around the value
+        band: float = self.__hysteresis / self.VOLTAGE_IN
+        neighbours: set[WindDirection] = {
+            self.__get_direction_by_mcp_value(value=value - band),
+            self.__get_direction_by_mcp_value(value=value + band),
+        }
 
-            last_direction = direction.value
+        return self.__last_direction if self.__last_direction in neighbours else direction
 
-        return last_direction
+    def __get_direction_by_mcp_value(self, value: float) -> WindDirection:
+        index: int = int(round(value * self.VOLTAGE_IN * 10))
+        return self.__LOOKUP_TABLE[min(max(index, 0), len(self.__LOOKUP_TABLE) - 1)]
@@ -0,0 +1,45 @@
+import logging
+from typing import List, Optional
+
+from aiohttp import web
+
+from src.controllers.controllers import Controller
+from src.metrics.metrics import metrics_registry
+
+# Scrapers negotiate the exposition format through the content type, https://prometheus.io/docs/instrumenting/exposition_formats/
+PROMETHEUS_CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class LocalServer(object):
+    __slots__ = ["__host", "__port", "__controllers", "__runner", "__logger"]
+
+    def __init__(self, host: str, port: int, controllers: List[Controller]) -> None:
+        self.__logger = logging.getLogger(name=self.__class__.__name__)
+
+        self.__host = host
+        self.__port = port
+        self.__controllers = controllers
+        self.__runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> None:
+        application = web.Application()
+        application.router.add_get(path="/metrics", handler=self.__get_metrics)
+        application.router.add_get(path="/latest", handler=self.__get_latest)
+
+        self.__runner = web.AppRunner(app=application, access_log=None)
+        await self.__runner.setup()
+        await web.TCPSite(runner=self.__runner, host=self.__host, port=self.__port).start()
+
+        self.__logger.info(msg=f"Local server listening on {self.__host}:{self.__port}")
+
+    async def close(self) -> None:
+        if self.__runner is not None:
+            await self.__runner.cleanup()
+
+    async def __get_metrics(self, _: web.Request) -> web.Response:
+        return web.Response(body=metrics_registry.to_prometheus().encode(), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
+
+    async def __get_latest(self, _: web.Request) -> web.Response:
+        return web.json_response(
+            data={controller.name: [measurement.to_dict() for measurement in controller.last_measurements] for controller in self.__controllers}
+        )
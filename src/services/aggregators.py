@@ -0,0 +1,234 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+from src.model.models import Measurement
+from src.services.buffers import SampleBuffer
+
+STATISTICS_DECIMALS: int = 2
+
+
+class Aggregator(ABC):
+    __slots__ = ["_field", "_sensor_id"]
+
+    def __init__(self, field: str, sensor_id: Optional[str] = None) -> None:
+        self._field = field
+        # When set, only the readings of that sensor are aggregated
+        self._sensor_id = sensor_id
+
+    @property
+    def field(self) -> str:
+        return self._field
+
+    @property
+    def sensor_id(self) -> Optional[str]:
+        return self._sensor_id
+
+    def add(self, reading: Measurement) -> None:
+        if self._sensor_id is not None and reading.sensor_id != self._sensor_id:
+            return
+
+        value: Any = getattr(reading, self._field)
+
+        if value is not None:
+            self._add(value=value)
+
+    @property
+    @abstractmethod
+    def count(self) -> int:
+        raise NotImplementedError("A sub-class must be implemented.")
+
+    @abstractmethod
+    def _add(self, value: Any) -> None:
+        raise NotImplementedError("A sub-class must be implemented.")
+
+    @abstractmethod
+    def reset(self) -> None:
+        raise NotImplementedError("A sub-class must be implemented.")
+
+
+class RunningStatistics(Aggregator):
+    # Welford's online algorithm, https://en.wikipedia.org/wiki/Algorithms_for_calculating_variance
+    __slots__ = ["__count", "__mean", "__squared_distance", "__minimum", "__maximum"]
+
+    def __init__(self, field: str, sensor_id: Optional[str] = None) -> None:
+        super().__init__(field=field, sensor_id=sensor_id)
+
+        self.reset()
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.__mean if self.__count > 0 else None
+
+    @property
+    def minimum(self) -> Optional[float]:
+        return self.__minimum
+
+    @property
+    def maximum(self) -> Optional[float]:
+        return self.__maximum
+
+    @property
+    def variance(self) -> Optional[float]:
+        return self.__squared_distance / self.__count if self.__count > 0 else None
+
+    @property
+    def standard_deviation(self) -> Optional[float]:
+        return math.sqrt(self.variance) if self.__count > 0 else None
+
+    def summary(self) -> dict[str, float]:
+        if self.__count == 0:
+            return {}
+
+        return {
+            "min": round(number=self.__minimum, ndigits=STATISTICS_DECIMALS),
+            "max": round(number=self.__maximum, ndigits=STATISTICS_DECIMALS),
+            "stddev": round(number=self.standard_deviation, ndigits=STATISTICS_DECIMALS),
+        }
+
+    def _add(self, value: float) -> None:
+        self.__count += 1
+
+        delta: float = value - self.__mean
+        self.__mean += delta / self.__count
+        self.__squared_distance += delta * (value - self.__mean)
+
+        self.__minimum = value if self.__minimum is None else min(self.__minimum, value)
+        self.__maximum = value if self.__maximum is None else max(self.__maximum, value)
+
+    def reset(self) -> None:
+        self.__count = 0
+        self.__mean = 0.0
+        self.__squared_distance = 0.0
+        self.__minimum = None
+        self.__maximum = None
+
+
+class RunningTotal(Aggregator):
+    __slots__ = ["__count", "__total"]
+
+    def __init__(self, field: str, sensor_id: Optional[str] = None) -> None:
+        super().__init__(field=field, sensor_id=sensor_id)
+
+        self.reset()
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    @property
+    def total(self) -> float:
+        return self.__total
+
+    def _add(self, value: float) -> None:
+        self.__count += 1
+        self.__total += value
+
+    def reset(self) -> None:
+        self.__count = 0
+        self.__total = 0
+
+
+class RollingPercentile(Aggregator):
+    __slots__ = ["__percentile", "__window"]
+
+    def __init__(self, field: str, percentile: float, window_size: int) -> None:
+        super().__init__(field=field)
+
+        if not 0 <= percentile <= 100:
+            raise ValueError(f"The percentile must be between 0 and 100, {percentile} given")
+
+        self.__percentile = percentile
+        self.__window = SampleBuffer(capacity=window_size)
+
+    @property
+    def count(self) -> int:
+        return len(self.__window)
+
+    @property
+    def value(self) -> Optional[float]:
+        # Only the last window_size samples are kept, so sorting them at flush time has a bounded cost
+        values: list[float] = sorted(self.__window.values())
+        if len(values) == 0:
+            return None
+
+        position: float = (len(values) - 1) * self.__percentile / 100
+        lower: int = math.floor(position)
+        upper: int = math.ceil(position)
+
+        return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+    def _add(self, value: float) -> None:
+        self.__window.append(value=value)
+
+    def reset(self) -> None:
+        self.__window.clear()
+
+
+class VectorAverage(Aggregator):
+    # Bearings are averaged as unit vectors weighted by the speed, so 350 and 10 degrees average to the north
+    __slots__ = ["__weight_field", "__count", "__sine", "__cosine", "__weighted_sine", "__weighted_cosine"]
+
+    def __init__(self, field: str, weight_field: str) -> None:
+        super().__init__(field=field)
+
+        self.__weight_field = weight_field
+        self.reset()
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    @property
+    def mean(self) -> Optional[float]:
+        if math.hypot(self.__weighted_sine, self.__weighted_cosine) > 0:
+            return math.degrees(math.atan2(self.__weighted_sine, self.__weighted_cosine)) % 360
+
+        # Calm samples carry no weight, the plain vector mean is used when every sample is calm
+        if math.hypot(self.__sine, self.__cosine) > 0:
+            return math.degrees(math.atan2(self.__sine, self.__cosine)) % 360
+
+        return None
+
+    @property
+    def standard_deviation(self) -> Optional[float]:
+        if self.__count == 0:
+            return None
+
+        mean_resultant_length: float = min(math.hypot(self.__sine, self.__cosine) / self.__count, 1.0)
+        if mean_resultant_length == 0:
+            return None
+
+        # A resultant length of one, every bearing equal, gives -0.0 from the logarithm
+        return math.degrees(math.sqrt(max(0.0, -2 * math.log(mean_resultant_length))))
+
+    def add(self, reading: Measurement) -> None:
+        bearing: Optional[float] = getattr(reading, self._field)
+
+        if bearing is not None:
+            self.__add_vector(bearing=bearing, weight=getattr(reading, self.__weight_field) or 0.0)
+
+    def _add(self, value: float) -> None:
+        self.__add_vector(bearing=value, weight=1.0)
+
+    def __add_vector(self, bearing: float, weight: float) -> None:
+        radians: float = math.radians(bearing)
+        sine: float = math.sin(radians)
+        cosine: float = math.cos(radians)
+
+        self.__count += 1
+        self.__sine += sine
+        self.__cosine += cosine
+        self.__weighted_sine += weight * sine
+        self.__weighted_cosine += weight * cosine
+
+    def reset(self) -> None:
+        self.__count = 0
+        self.__sine = 0.0
+        self.__cosine = 0.0
+        self.__weighted_sine = 0.0
+        self.__weighted_cosine = 0.0
@@ -0,0 +1,39 @@
+from array import array
+from typing import List
+
+
+class SampleBuffer(object):
+    # Fixed capacity ring of float values, the oldest value is overwritten once it is full
+    __slots__ = ["__capacity", "__values", "__next_index", "__length"]
+
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError(f"The capacity of the buffer must be positive, {capacity} given")
+
+        self.__capacity = capacity
+        self.__values = array("d", bytes(8 * capacity))
+        self.__next_index = 0
+        self.__length = 0
+
+    def __len__(self) -> int:
+        return self.__length
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    def append(self, value: float) -> None:
+        self.__values[self.__next_index] = value
+        self.__next_index = (self.__next_index + 1) % self.__capacity
+        self.__length = min(self.__length + 1, self.__capacity)
+
+    def values(self) -> List[float]:
+        # Oldest first
+        if self.__length < self.__capacity:
+            return self.__values[: self.__length].tolist()
+
+        return self.__values[self.__next_index :].tolist() + self.__values[: self.__next_index].tolist()
+
+    def clear(self) -> None:
+        self.__next_index = 0
+        self.__length = 0
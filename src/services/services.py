@@ -1,203 +1,393 @@
 import asyncio
 import logging
 import random
+import time
 from abc import ABC, abstractmethod
-from datetime import datetime
-from statistics import mode, mean
-from typing import List
-
-import bme280
-import smbus2
-from bme280 import compensated_readings
-from gpiozero import Button
-from w1thermsensor import AsyncW1ThermSensor, Unit
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, List, Optional
 
 from src.config.global_config import global_config
-from src.model.models import Measurement, WindDirection
+from src.metrics.metrics import metrics_registry
+from src.model.models import (
+    AirMeasurement,
+    GroundTemperatureMeasurement,
+    Measurement,
+    RainfallMeasurement,
+    WindDirection,
+    WindMeasurement,
+)
 from src.sensors.anemometer import Anemometer
-from src.sensors.vane import Vane
-
+from src.sensors.bme280 import Bme280, Bme280Reading
+from src.sensors.buses import BusExecutor, get_bus_executor
+from src.sensors.gusts import GustSummary
+from src.sensors.hardware import get_hardware
+from src.sensors.interrupts import InterruptBridge
+from src.sensors.vane import Vane, VaneReading
+from src.services.aggregators import STATISTICS_DECIMALS, Aggregator, RollingPercentile, RunningStatistics, RunningTotal, VectorAverage
 
-class Service(ABC):
-    _SECONDS_BETWEEN_READINGS: int = 15
+if TYPE_CHECKING:
+    from w1thermsensor import AsyncW1ThermSensor
 
-    __slots__ = ["__readings", "__getting_readings", "_logger"]
+# The sensor drivers are imported in production only and when the service is created, so disabled sensors and
+# development runs do not pay for them at start up
 
-    def __init__(self) -> None:
-        self._logger = logging.getLogger(name=self.__class__.__name__)
 
-        self.__readings = []
-        self.__getting_readings = False
+class Service(ABC):
+    __slots__ = ["__seconds_between_readings", "__aggregators", "__window_samples", "_logger"]
 
-        asyncio.create_task(coro=self._add_value_to_readings())
+    def __init__(self, seconds_between_readings: Optional[float]) -> None:
+        self._logger = logging.getLogger(name=self.__class__.__name__)
 
-    @property
-    def readings(self) -> List[Measurement]:
-        return self.__readings
+        self.__seconds_between_readings = seconds_between_readings
+        self.__aggregators = self._create_aggregators()
+        self.__window_samples = 0
 
     @property
-    def getting_readings(self) -> bool:
-        return self.__getting_readings
-
-    async def _add_value_to_readings(self) -> None:
-        while True:
-            try:
-                if self.__getting_readings:
-                    return
+    def seconds_between_readings(self) -> Optional[float]:
+        # None when the sensor pushes its readings and does not need to be sampled
+        return self.__seconds_between_readings
 
-                reading: Measurement = await self.get_reading()
-                self.readings.append(reading)
-                self._logger.debug(msg=f"Obtained reading: {reading.to_dict()}")
+    async def sample(self) -> None:
+        try:
+            started_at: float = time.perf_counter()
+            readings: List[Measurement] = await self.get_readings()
+            metrics_registry.observe(
+                name="wsp_sensor_read_duration_seconds",
+                description="Time taken by a sensor reading",
+                value=time.perf_counter() - started_at,
+                labels={"service": self.__class__.__name__},
+            )
+
+            for reading in readings:
+                self._add_reading(reading=reading)
+
+                # Serialising every sample is expensive at high rates, it is only done when it is going to be logged
+                if self._logger.isEnabledFor(level=logging.DEBUG):
+                    self._logger.debug(msg=f"Obtained reading: {reading.to_dict()}")
+        except Exception as e:
+            metrics_registry.increment_counter(
+                name="wsp_dropped_samples_total",
+                description="Samples lost because the sensor could not be read",
+                labels={"service": self.__class__.__name__},
+            )
+            self._logger.exception(msg="Error adding the reading to the list of samples", exc_info=e)
+
+    def _add_reading(self, reading: Measurement) -> None:
+        for aggregator in self.__aggregators.values():
+            aggregator.add(reading=reading)
+
+        metrics_registry.increment_counter(
+            name="wsp_samples_total", description="Samples added to the aggregation windows", labels={"service": self.__class__.__name__}
+        )
+        self.__set_window_samples(window_samples=self.__window_samples + 1)
+
+    def __set_window_samples(self, window_samples: int) -> None:
+        self.__window_samples = window_samples
+        metrics_registry.set_gauge(
+            name="wsp_window_samples",
+            description="Samples waiting in the current aggregation window",
+            value=window_samples,
+            labels={"service": self.__class__.__name__},
+        )
 
-                if global_config.environment.is_testing:
-                    break
-            except Exception as e:
-                self._logger.exception(msg="Error adding the reading to the list of samples", exc_info=e)
-            finally:
-                await asyncio.sleep(delay=self._SECONDS_BETWEEN_READINGS)
+    async def get_measurements(self) -> List[Measurement]:
+        # Swapping the window keeps the sampling running, readings obtained from now on go to the new one
+        aggregators: dict[str, Aggregator] = self.__aggregators
+        self.__aggregators = self._create_aggregators()
+        self.__set_window_samples(window_samples=0)
 
-    async def get_measurement(self) -> Measurement:
         try:
-            self.__getting_readings = True
-
-            return await self._get_measurement_average()
+            started_at: float = time.perf_counter()
+            measurements: List[Measurement] = await self._get_measurements(aggregators=aggregators)
+            metrics_registry.observe(
+                name="wsp_aggregation_duration_seconds",
+                description="Time taken to aggregate a window of samples",
+                value=time.perf_counter() - started_at,
+                labels={"service": self.__class__.__name__},
+            )
+
+            return measurements
         except Exception as e:
             self._logger.error(msg="Error getting a measurement", exc_info=e)
-        finally:
-            self.__readings.clear()
-            self.__getting_readings = False
+            return []
+
+    async def get_readings(self) -> List[Measurement]:
+        # Services reading several sensors at once override it, the rest implement get_reading
+        return [await self.get_reading()]
 
     @abstractmethod
     async def get_reading(self) -> Measurement:
         raise NotImplementedError("A sub-class must be implemented.")
 
     @abstractmethod
-    async def _get_measurement_average(self) -> Measurement:
+    def _create_aggregators(self) -> dict[str, Aggregator]:
         raise NotImplementedError("A sub-class must be implemented.")
 
+    async def _get_measurements(self, aggregators: dict[str, Aggregator]) -> List[Measurement]:
+        measurement: Optional[Measurement] = await self._get_measurement_average(aggregators=aggregators)
+        return [measurement] if measurement is not None else []
 
-class AirMeasurementService(Service):
-    __slots__ = ["__bus", "__address", "__calibration_params"]
+    @abstractmethod
+    async def _get_measurement_average(self, aggregators: dict[str, Aggregator]) -> Optional[Measurement]:
+        raise NotImplementedError("A sub-class must be implemented.")
 
-    def __init__(self) -> None:
-        super().__init__()
 
-        if global_config.environment.is_production:
-            self.__bus = smbus2.SMBus(bus=global_config.device.bme280_sensor_port)
-            self.__address = int(global_config.device.bme280_sensor_address, 16)
-            self.__calibration_params = bme280.load_calibration_params(bus=self.__bus, address=self.__address)
+class AirMeasurementService(Service):
+    __slots__ = ["__sensor", "__bus_executor"]
+
+    def __init__(self, port: int, address: str) -> None:
+        super().__init__(seconds_between_readings=global_config.device.bme280_seconds_between_readings)
+
+        if global_config.environment.uses_hardware:
+            self.__sensor = Bme280(
+                bus=get_hardware().open_i2c_bus(port=port),
+                address=int(address, 16),
+                mode=global_config.device.bme280_mode,
+                temperature_oversampling=global_config.device.bme280_temperature_oversampling,
+                pressure_oversampling=global_config.device.bme280_pressure_oversampling,
+                humidity_oversampling=global_config.device.bme280_humidity_oversampling,
+                filter_coefficient=global_config.device.bme280_filter_coefficient,
+                standby_time=global_config.device.bme280_standby_time,
+            )
+            self.__bus_executor: BusExecutor = get_bus_executor(name=f"i2c-{port}")
+            self.__sensor.configure()
 
     async def get_reading(self) -> Measurement:
-        if global_config.environment.is_production:
-            data: compensated_readings = bme280.sample(bus=self.__bus, address=self.__address, compensation_params=self.__calibration_params)
-            return Measurement(temperature=data.temperature, pressure=data.pressure, humidity=data.humidity)
-
-        return Measurement(temperature=random.randint(a=-10, b=40), pressure=random.randint(a=950, b=1050), humidity=random.randint(a=10, b=90))
-
-    async def _get_measurement_average(self) -> Measurement:
-        temperature: float = 0
-        pressure: float = 0
-        humidity: float = 0
-        number_of_readings: int = len(self.readings) if len(self.readings) > 0 else 1
-
-        for reading in self.readings:
-            temperature += reading.temperature
-            pressure += reading.pressure
-            humidity += reading.humidity
-
-        return Measurement(
-            temperature=int(temperature / number_of_readings),
-            pressure=int(pressure / number_of_readings),
-            humidity=int(humidity / number_of_readings),
-            date_time=datetime.now(),
+        if global_config.environment.uses_hardware:
+            data: Bme280Reading = await self.__bus_executor.run(function=self.__sensor.read)
+            return AirMeasurement(temperature=data.temperature, pressure=data.pressure, humidity=data.humidity)
+
+        return AirMeasurement(temperature=random.randint(a=-10, b=40), pressure=random.randint(a=950, b=1050), humidity=random.randint(a=10, b=90))
+
+    def _create_aggregators(self) -> dict[str, Aggregator]:
+        return {field: RunningStatistics(field=field) for field in ["temperature", "pressure", "humidity"]}
+
+    async def _get_measurement_average(self, aggregators: dict[str, Aggregator]) -> Optional[Measurement]:
+        temperature: RunningStatistics = aggregators["temperature"]
+        pressure: RunningStatistics = aggregators["pressure"]
+        humidity: RunningStatistics = aggregators["humidity"]
+
+        # A window without readings reports nothing rather than made up values, as the ground temperature does
+        if temperature.count == 0 and pressure.count == 0 and humidity.count == 0:
+            self._logger.warning(msg="No readings from the BME280 in the last window")
+            return None
+
+        return AirMeasurement(
+            temperature=int(temperature.mean) if temperature.count > 0 else None,
+            pressure=int(pressure.mean) if pressure.count > 0 else None,
+            humidity=int(humidity.mean) if humidity.count > 0 else None,
+            date_time=datetime.now(tz=timezone.utc),
+            statistics={"temperature": temperature.summary(), "pressure": pressure.summary(), "humidity": humidity.summary()},
         )
 
 
 class GroundTemperatureService(Service):
-    __slots__ = ["__sensor"]
+    __slots__ = ["__sensors", "__sensor_ids"]
+
+    def __init__(self, sensor_ids: List[str], resolution: Optional[int] = None) -> None:
+        # The driver identifies the probes without the family code, "28-0316a2791a3c" and "0316a2791a3c" are the same probe
+        sensor_ids = [sensor_id.rpartition("-")[2] for sensor_id in sensor_ids]
+        self.__sensor_ids: List[Optional[str]]
+
+        # Every probe has its own window, so the probes must be known before the first one is created
+        if global_config.environment.uses_hardware:
+            available_sensors: dict[str, "AsyncW1ThermSensor"] = {sensor.id: sensor for sensor in get_hardware().get_w1_sensors()}
+            missing_sensor_ids: List[str] = [sensor_id for sensor_id in sensor_ids if sensor_id not in available_sensors]
+            if len(missing_sensor_ids) > 0:
+                raise ValueError(f"1-Wire probes {', '.join(missing_sensor_ids)} not found, available ones are {', '.join(available_sensors)}")
+
+            self.__sensor_ids = sensor_ids or sorted(available_sensors)
+            self.__sensors = [available_sensors[sensor_id] for sensor_id in self.__sensor_ids]
+        else:
+            # A single probe without identity is simulated unless some are configured
+            self.__sensor_ids = sensor_ids or [None]
+
+        super().__init__(seconds_between_readings=global_config.device.ground_temperature_seconds_between_readings)
+
+        if global_config.environment.uses_hardware:
+            if len(self.__sensors) == 0:
+                raise ValueError("No 1-Wire probes found")
 
-    def __init__(self) -> None:
-        super().__init__()
+            if resolution is not None:
+                self.__set_resolution(resolution=resolution)
 
-        if global_config.environment.is_production:
-            self.__sensor = AsyncW1ThermSensor()
+            self._logger.info(msg=f"Reading the 1-Wire probes {', '.join(self.__sensor_ids)}")
+
+    def __set_resolution(self, resolution: int) -> None:
+        # Lower resolutions convert faster, 9 bits take ~94 ms and 12 bits ~750 ms
+        for sensor in self.__sensors:
+            try:
+                sensor.set_resolution(resolution=resolution)
+            except Exception as e:
+                self._logger.warning(msg=f"Resolution of the 1-Wire probe {sensor.id} could not be set to {resolution} bits", exc_info=e)
 
     async def get_reading(self) -> Measurement:
-        if global_config.environment.is_production:
-            return Measurement(temperature=int(await self.__sensor.get_temperature(unit=Unit.DEGREES_C)))
+        # A single reading is the one of the first probe, the sampling reads all of them with get_readings
+        if global_config.environment.uses_hardware:
+            sensor: "AsyncW1ThermSensor" = self.__sensors[0]
+            return GroundTemperatureMeasurement(temperature=int(await sensor.get_temperature()), sensor_id=sensor.id)
 
-        return Measurement(temperature=random.randint(a=-10, b=40))
+        return GroundTemperatureMeasurement(temperature=random.randint(a=-10, b=40), sensor_id=self.__sensor_ids[0])
 
-    async def _get_measurement_average(self) -> Measurement:
-        average: int = int(mean([reading.temperature for reading in self.readings])) if len(self.readings) > 0 else 0
-        return Measurement(temperature=average, date_time=datetime.now())
+    async def get_readings(self) -> List[Measurement]:
+        if global_config.environment.uses_hardware:
+            # Each probe converts on its own, reading them together bounds the sampling to the slowest conversion
+            temperatures: List[float | BaseException] = await asyncio.gather(
+                *(sensor.get_temperature() for sensor in self.__sensors), return_exceptions=True
+            )
+            readings: List[Measurement] = []
 
+            for sensor, temperature in zip(self.__sensors, temperatures):
+                if isinstance(temperature, BaseException):
+                    # A failing probe does not discard the readings of the others
+                    self._logger.warning(msg=f"Error reading the 1-Wire probe {sensor.id}", exc_info=temperature)
+                    continue
 
-class RainfallService(Service):
-    __slots__ = ["__sensor"]
+                readings.append(GroundTemperatureMeasurement(temperature=int(temperature), sensor_id=sensor.id))
 
-    __BUCKET_SIZE_IN_MM: float = 0.2794
+            return readings
 
-    def __init__(self) -> None:
-        super().__init__()
+        return [GroundTemperatureMeasurement(temperature=random.randint(a=-10, b=40), sensor_id=sensor_id) for sensor_id in self.__sensor_ids]
 
-        if global_config.environment.is_production:
-            self.__sensor = Button(pin=global_config.device.rain_gauge_port)
-            self.__sensor.when_pressed = self._sync_get_reading
+    def _create_aggregators(self) -> dict[str, Aggregator]:
+        return {sensor_id or "temperature": RunningStatistics(field="temperature", sensor_id=sensor_id) for sensor_id in self.__sensor_ids}
 
-    async def _add_value_to_readings(self) -> None:
-        if global_config.environment.is_development:
-            while True:
-                try:
-                    if self.getting_readings:
-                        return
+    async def _get_measurements(self, aggregators: dict[str, Aggregator]) -> List[Measurement]:
+        measurements: List[Measurement] = []
 
-                    await self.get_reading()
-                except Exception as e:
-                    self._logger.exception(msg="Error adding the reading to the list of samples", exc_info=e)
-                finally:
-                    await asyncio.sleep(delay=self._SECONDS_BETWEEN_READINGS)
-        else:
-            # This sensor does not need to read from the sensor as the when_pressed event is triggered only when water is detected
-            pass
+        # Every probe is averaged on its own
+        for key, temperature in aggregators.items():
+            measurement: Optional[Measurement] = await self._get_measurement_average(aggregators={key: temperature})
+            if measurement is not None:
+                measurements.append(measurement)
 
-    def _sync_get_reading(self) -> None:
-        asyncio.run(self.get_reading())
+        return measurements
 
-    async def get_reading(self) -> None:
-        if self.getting_readings:
-            return
+    async def _get_measurement_average(self, aggregators: dict[str, Aggregator]) -> Optional[Measurement]:
+        temperature: RunningStatistics = next(iter(aggregators.values()))
 
-        reading: Measurement = Measurement(amount=1)
-        self.readings.append(reading)
-        self._logger.debug(msg=f"Obtained reading: {reading.to_dict()}")
+        # A probe without readings in the window reports nothing rather than a made up temperature
+        if temperature.count == 0:
+            self._logger.warning(msg=f"No readings from the 1-Wire probe {temperature.sensor_id} in the last window")
+            return None
 
-    async def _get_measurement_average(self) -> Measurement:
-        return Measurement(amount=int(round(number=len(self.readings) * self.__BUCKET_SIZE_IN_MM)), date_time=datetime.now())
+        return GroundTemperatureMeasurement(
+            temperature=int(temperature.mean),
+            sensor_id=temperature.sensor_id,
+            date_time=datetime.now(tz=timezone.utc),
+            statistics={"temperature": temperature.summary()},
+        )
 
 
-class WindMeasurementService(Service):
-    __slots__ = ["__anemometer", "__vane"]
+class RainfallService(Service):
+    __slots__ = ["__sensor"]
+
+    BUCKET_SIZE_IN_MM: float = 0.2794
+
+    def __init__(self, port: int, bounce_time: Optional[float] = None) -> None:
+        # In production the gauge pushes every tip, bucket tips are only simulated periodically in development
+        super().__init__(
+            seconds_between_readings=global_config.device.rain_gauge_seconds_between_readings if global_config.environment.is_development else None
+        )
+
+        if global_config.environment.uses_hardware:
+            self.__sensor = InterruptBridge(port_number=port, bounce_time=bounce_time, on_edges=self.__add_tips)
 
-    def __init__(self, anemometer_port: int) -> None:
-        super().__init__()
+    def __add_tips(self, edges: List[float]) -> None:
+        reading: Measurement = RainfallMeasurement(amount=len(edges))
+        self._add_reading(reading=reading)
 
-        if global_config.environment.is_production:
-            self.__anemometer = Anemometer(port_number=anemometer_port)
-            self.__vane = Vane()
+        if self._logger.isEnabledFor(level=logging.DEBUG):
+            self._logger.debug(msg=f"Obtained reading: {reading.to_dict()}")
 
     async def get_reading(self) -> Measurement:
-        if global_config.environment.is_production:
-            return Measurement(speed=int(self.__anemometer.get_speed()), direction=self.__vane.get_direction())
+        return RainfallMeasurement(amount=1)
+
+    def _create_aggregators(self) -> dict[str, Aggregator]:
+        return {"amount": RunningTotal(field="amount")}
+
+    async def _get_measurement_average(self, aggregators: dict[str, Aggregator]) -> Optional[Measurement]:
+        amount: RunningTotal = aggregators["amount"]
+        return RainfallMeasurement(amount=int(round(number=amount.total * self.BUCKET_SIZE_IN_MM)), date_time=datetime.now(tz=timezone.utc))
+
+
+class WindMeasurementService(Service):
+    __slots__ = ["__anemometer", "__vane", "__bus_executor"]
+
+    __SPEED_PERCENTILE: int = 90
+
+    def __init__(self, anemometer_port: int, anemometer_bounce_time: Optional[float] = None) -> None:
+        super().__init__(seconds_between_readings=global_config.device.anemometer_seconds_between_readings)
 
-        return Measurement(speed=random.randint(a=10, b=100), direction=random.choice(seq=list(WindDirection)).value)
+        if global_config.environment.uses_hardware:
+            self.__anemometer = Anemometer(port_number=anemometer_port, bounce_time=anemometer_bounce_time)
+            self.__vane = Vane(
+                samples_per_reading=global_config.device.vane_samples_per_reading,
+                filter_name=global_config.device.vane_filter,
+                hysteresis=global_config.device.vane_hysteresis,
+            )
+            self.__bus_executor: BusExecutor = get_bus_executor(name="spi-0")
 
-    async def _get_measurement_average(self) -> Measurement:
-        average_speed: int = int(mean([reading.speed for reading in self.readings])) if len(self.readings) > 0 else 0
-        mode_wind_direction: str = mode([reading.direction for reading in self.readings]) if len(self.readings) > 0 else "-"
+    async def get_reading(self) -> Measurement:
+        if global_config.environment.uses_hardware:
+            vane_reading: VaneReading = await self.__bus_executor.run(function=self.__vane.get_reading)
+            return WindMeasurement(
+                speed=int(self.__anemometer.get_speed()), bearing=vane_reading.bearing, direction_confidence=vane_reading.confidence
+            )
+
+        return WindMeasurement(
+            speed=random.randint(a=10, b=100), bearing=random.choice(seq=list(WindDirection)).bearing, direction_confidence=random.random()
+        )
 
-        return Measurement(
-            speed=average_speed,
-            direction=mode_wind_direction,
-            date_time=datetime.now(),
+    def _create_aggregators(self) -> dict[str, Aggregator]:
+        return {
+            "speed": RunningStatistics(field="speed"),
+            "speed_percentile": RollingPercentile(
+                field="speed", percentile=self.__SPEED_PERCENTILE, window_size=global_config.device.wind_speed_percentile_window
+            ),
+            "bearing": VectorAverage(field="bearing", weight_field="speed"),
+            "direction_confidence": RunningStatistics(field="direction_confidence"),
+        }
+
+    async def _get_measurement_average(self, aggregators: dict[str, Aggregator]) -> Optional[Measurement]:
+        speed: RunningStatistics = aggregators["speed"]
+        speed_percentile: RollingPercentile = aggregators["speed_percentile"]
+        bearing: VectorAverage = aggregators["bearing"]
+        direction_confidence: RunningStatistics = aggregators["direction_confidence"]
+
+        if speed.count == 0:
+            self._logger.warning(msg="No readings from the anemometer in the last window")
+            return None
+
+        speed_statistics: dict[str, float] = speed.summary()
+        mean_bearing: Optional[float] = bearing.mean
+        statistics: dict[str, dict[str, float]] = {"speed": speed_statistics}
+
+        if speed_percentile.count > 0:
+            speed_statistics[f"p{self.__SPEED_PERCENTILE}"] = round(number=speed_percentile.value, ndigits=STATISTICS_DECIMALS)
+
+        if bearing.standard_deviation is not None:
+            statistics["bearing"] = {"stddev": round(number=bearing.standard_deviation, ndigits=STATISTICS_DECIMALS)}
+
+        if global_config.environment.uses_hardware:
+            gust_summary: GustSummary = self.__anemometer.get_gust_summary()
+        else:
+            gust_summary: GustSummary = GustSummary(
+                gust=speed.maximum,
+                gust_date_time=datetime.now(tz=timezone.utc),
+                average_speed_2_minutes=speed.mean,
+                average_speed_10_minutes=speed.mean,
+            )
+
+        return WindMeasurement(
+            speed=int(speed.mean),
+            direction=WindDirection.from_bearing(bearing=mean_bearing).value,
+            bearing=round(number=mean_bearing, ndigits=STATISTICS_DECIMALS) % 360 if mean_bearing is not None else None,
+            direction_confidence=round(number=direction_confidence.mean, ndigits=STATISTICS_DECIMALS) if direction_confidence.count > 0 else None,
+            gust=int(gust_summary.gust),
+            gust_date_time=gust_summary.gust_date_time,
+            average_speed_2_minutes=int(gust_summary.average_speed_2_minutes),
+            average_speed_10_minutes=int(gust_summary.average_speed_10_minutes),
+            date_time=datetime.now(tz=timezone.utc),
+            statistics=statistics,
         )
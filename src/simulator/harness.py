@@ -0,0 +1,157 @@
+import asyncio
+import gzip
+import json
+import logging
+import time
+from typing import List, Optional
+from urllib.parse import urlparse
+
+import msgpack
+import socketio
+from aiohttp import web
+
+from src.config.global_config import global_config
+
+# Runs the whole application against stand-in servers of the API and the socket, usually with simulated hardware:
+#   ENVIRONMENT=simulation SIMULATOR_TIME_SCALE=3600 SIMULATOR_STORM_FACTOR=10 python -m src.simulator.harness
+
+
+class StandInServers(object):
+    __slots__ = [
+        "__api_url",
+        "__socket_url",
+        "__runners",
+        "__socket_server",
+        "__requests",
+        "__measurements",
+        "__events",
+        "__socket_measurements",
+        "__received_bytes",
+        "__logger",
+    ]
+
+    def __init__(self, api_url: str, socket_url: str) -> None:
+        self.__logger = logging.getLogger(name=self.__class__.__name__)
+
+        self.__api_url = api_url
+        self.__socket_url = socket_url
+        self.__runners: List[web.AppRunner] = []
+        self.__socket_server = socketio.AsyncServer(async_mode="aiohttp")
+        self.__socket_server.on(event="*", handler=self.__on_event)
+        self.__requests = 0
+        self.__measurements = 0
+        self.__events = 0
+        self.__socket_measurements = 0
+        self.__received_bytes = 0
+
+    @property
+    def requests(self) -> int:
+        return self.__requests
+
+    @property
+    def measurements(self) -> int:
+        return self.__measurements
+
+    @property
+    def events(self) -> int:
+        return self.__events
+
+    @property
+    def socket_measurements(self) -> int:
+        return self.__socket_measurements
+
+    @property
+    def received_bytes(self) -> int:
+        return self.__received_bytes
+
+    async def start(self) -> None:
+        api_application = web.Application()
+        api_application.router.add_post(path="/auth", handler=self.__authenticate)
+        api_application.router.add_post(path="/measurements/{name}", handler=self.__add_measurements)
+
+        if urlparse(url=self.__api_url).port == urlparse(url=self.__socket_url).port:
+            # A single server answers both when they share the port
+            self.__socket_server.attach(app=api_application)
+            await self.__start_application(application=api_application, url=self.__api_url)
+        else:
+            socket_application = web.Application()
+            self.__socket_server.attach(app=socket_application)
+            await self.__start_application(application=api_application, url=self.__api_url)
+            await self.__start_application(application=socket_application, url=self.__socket_url)
+
+    async def __start_application(self, application: web.Application, url: str) -> None:
+        runner = web.AppRunner(app=application, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner=runner, host=urlparse(url=url).hostname, port=urlparse(url=url).port).start()
+        self.__runners.append(runner)
+
+        self.__logger.info(msg=f"Stand-in server listening on {url}")
+
+    async def close(self) -> None:
+        for runner in self.__runners:
+            await runner.cleanup()
+
+        self.__runners.clear()
+
+    async def __authenticate(self, _: web.Request) -> web.Response:
+        return web.json_response(data={"access_token": "simulated"})
+
+    async def __add_measurements(self, request: web.Request) -> web.Response:
+        body: bytes = await request.read()
+        self.__requests += 1
+        self.__received_bytes += len(body)
+
+        # aiohttp inflates the body itself unless the encoding header is missing
+        if body[:2] == b"\x1f\x8b":
+            body = gzip.decompress(data=body)
+
+        payload: dict = json.loads(body)
+        # Bulk requests carry the measurements of several endpoints
+        self.__measurements += len(payload["measurements"]) if request.match_info["name"] == "bulk" else 1
+
+        return web.Response(status=201)
+
+    async def __on_event(self, event: str, sid: str, data: Optional[str | bytes] = None) -> str:
+        self.__events += 1
+        self.__received_bytes += len(data or "")
+
+        if isinstance(data, bytes):
+            payload: dict | list = msgpack.unpackb(data, timestamp=3)
+        else:
+            payload: dict | list = json.loads(data or "{}")
+
+        # Batched emissions carry the list of the measurements of the event
+        self.__socket_measurements += len(payload) if isinstance(payload, list) else 1
+
+        return "ok"
+
+
+async def run() -> int:
+    # main sets the telemetry up when it is imported, after the configuration of the harness is read
+    from src.main import main
+
+    logger = logging.getLogger(name="harness")
+    stand_in_servers = StandInServers(api_url=global_config.api.root_url, socket_url=global_config.socket.socket_url)
+    await stand_in_servers.start()
+    started_at: float = time.monotonic()
+
+    try:
+        if global_config.simulator.duration_seconds > 0:
+            try:
+                return await asyncio.wait_for(main(), timeout=global_config.simulator.duration_seconds)
+            except TimeoutError:
+                return 0
+
+        return await main()
+    finally:
+        elapsed_seconds: float = time.monotonic() - started_at
+        logger.info(
+            msg=f"Stand-in servers received {stand_in_servers.measurements} measurements in {stand_in_servers.requests} requests"
+            f" and {stand_in_servers.socket_measurements} in {stand_in_servers.events} socket events, {stand_in_servers.received_bytes} bytes in {elapsed_seconds:.1f} seconds"
+            f" ({stand_in_servers.measurements / elapsed_seconds:.2f} measurements/s)"
+        )
+        await stand_in_servers.close()
+
+
+if __name__ == "__main__":
+    exit(asyncio.run(run()))
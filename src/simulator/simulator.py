@@ -0,0 +1,456 @@
+import asyncio
+import bisect
+import csv
+import errno
+import logging
+import math
+import random
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, replace
+from typing import Callable, List, Optional
+
+from src.config.global_config import global_config
+from src.model.models import WindDirection
+from src.sensors.anemometer import Anemometer
+from src.sensors.bme280 import Bme280Calibration, Bme280Reading, compensate
+from src.sensors.hardware import Hardware
+from src.sensors.vane import Vane
+from src.services.services import RainfallService
+
+_SECONDS_PER_DAY: int = 86400
+
+# Calibration of a real BME280, the compensated values of the simulated chip go through the same formulas as the real one
+_CALIBRATION: Bme280Calibration = Bme280Calibration(
+    dig_t1=27504,
+    dig_t2=26435,
+    dig_t3=-1000,
+    dig_p1=36477,
+    dig_p2=-10685,
+    dig_p3=3024,
+    dig_p4=2855,
+    dig_p5=140,
+    dig_p6=-7,
+    dig_p7=15500,
+    dig_p8=-14600,
+    dig_p9=6000,
+    dig_h1=75,
+    dig_h2=362,
+    dig_h3=0,
+    dig_h4=313,
+    dig_h5=50,
+    dig_h6=30,
+)
+_CHIP_ID_REGISTER: int = 0xD0
+_CHIP_ID: int = 0x60
+_CALIBRATION_TP_REGISTER: int = 0x88
+_CALIBRATION_H_REGISTER: int = 0xE1
+_CTRL_HUM_REGISTER: int = 0xF2
+_CTRL_MEAS_REGISTER: int = 0xF4
+_DATA_REGISTER: int = 0xF7
+_FORCED_MODE: int = 0b01
+_NORMAL_MODE: int = 0b11
+_SKIPPED_TEMPERATURE_OR_PRESSURE: int = 0x80000
+_SKIPPED_HUMIDITY: int = 0x8000
+
+# Conversion time of the DS18B20 by resolution bits
+_W1_CONVERSION_SECONDS: dict[int, float] = {9: 0.094, 10: 0.1875, 11: 0.375, 12: 0.75}
+_W1_DEFAULT_RESOLUTION: int = 12
+
+
+@dataclass(frozen=True)
+class WeatherConditions:
+    # ºC, hPa, %, ºC, km/h, degrees and mm/h
+    temperature: float
+    pressure: float
+    humidity: float
+    ground_temperature: float
+    wind_speed: float
+    bearing: float
+    rain_rate: float
+
+
+class WeatherTrace(ABC):
+    __slots__ = []
+
+    @abstractmethod
+    def get_conditions(self, seconds: float) -> WeatherConditions:
+        raise NotImplementedError("A sub-class must be implemented.")
+
+
+class SyntheticWeatherTrace(WeatherTrace):
+    __slots__ = ["__seed"]
+
+    def __init__(self, seed: int = 0) -> None:
+        self.__seed = seed
+
+    def get_conditions(self, seconds: float) -> WeatherConditions:
+        # Daily cycles peaking in the afternoon, slower pressure fronts and showers every couple of days
+        day: float = math.sin(2 * math.pi * (seconds / _SECONDS_PER_DAY - 0.375))
+        gusts: float = self.__noise(seconds=seconds, period=7.0)
+
+        return WeatherConditions(
+            temperature=15 + 8 * day + self.__noise(seconds=seconds, period=600.0),
+            pressure=1013 + 8 * math.sin(2 * math.pi * seconds / (4 * _SECONDS_PER_DAY)),
+            humidity=min(max(65 - 20 * day, 5), 100),
+            ground_temperature=12 + 3 * math.sin(2 * math.pi * (seconds / _SECONDS_PER_DAY - 0.5)),
+            wind_speed=max(12 + 8 * math.sin(2 * math.pi * seconds / (6 * 3600)) + 6 * gusts, 0),
+            bearing=(225 + 60 * math.sin(2 * math.pi * seconds / (9 * 3600))) % 360,
+            rain_rate=max(4 * math.sin(2 * math.pi * seconds / (2 * _SECONDS_PER_DAY)), 0),
+        )
+
+    def __noise(self, seconds: float, period: float) -> float:
+        # Smooth noise between -1 and 1, the same seed and time always give the same value
+        step: int = int(seconds // period)
+        start: float = random.Random(hash((self.__seed, period, step))).uniform(-1, 1)
+        end: float = random.Random(hash((self.__seed, period, step + 1))).uniform(-1, 1)
+        weight: float = (1 - math.cos(math.pi * (seconds / period - step))) / 2
+
+        return start + (end - start) * weight
+
+
+class RecordedWeatherTrace(WeatherTrace):
+    __slots__ = ["__seconds", "__conditions"]
+
+    def __init__(self, path: str) -> None:
+        # A CSV file with a "seconds" column plus one per field of the conditions, played in a loop
+        with open(file=path, newline="") as trace_file:
+            rows: List[dict[str, str]] = sorted(csv.DictReader(trace_file), key=lambda row: float(row["seconds"]))
+
+        if len(rows) < 2:
+            raise ValueError(f"The weather trace {path} needs at least two rows")
+
+        self.__seconds: List[float] = [float(row["seconds"]) for row in rows]
+        self.__conditions: List[WeatherConditions] = [
+            WeatherConditions(**{field: float(row[field]) for field in WeatherConditions.__dataclass_fields__}) for row in rows
+        ]
+
+    def get_conditions(self, seconds: float) -> WeatherConditions:
+        seconds = self.__seconds[0] + seconds % (self.__seconds[-1] - self.__seconds[0])
+        index: int = min(bisect.bisect_right(self.__seconds, seconds), len(self.__seconds) - 1)
+        previous: WeatherConditions = self.__conditions[index - 1]
+        following: WeatherConditions = self.__conditions[index]
+        weight: float = (seconds - self.__seconds[index - 1]) / (self.__seconds[index] - self.__seconds[index - 1])
+
+        return WeatherConditions(
+            temperature=previous.temperature + (following.temperature - previous.temperature) * weight,
+            pressure=previous.pressure + (following.pressure - previous.pressure) * weight,
+            humidity=previous.humidity + (following.humidity - previous.humidity) * weight,
+            ground_temperature=previous.ground_temperature + (following.ground_temperature - previous.ground_temperature) * weight,
+            wind_speed=previous.wind_speed + (following.wind_speed - previous.wind_speed) * weight,
+            # Bearings wrap around the north, the previous one is kept until the next row
+            bearing=previous.bearing,
+            rain_rate=previous.rain_rate + (following.rain_rate - previous.rain_rate) * weight,
+        )
+
+
+class WeatherClock(object):
+    __slots__ = ["__trace", "__time_scale", "__storm_factor", "__started_at"]
+
+    def __init__(self, trace: WeatherTrace, time_scale: float = 1.0, storm_factor: float = 1.0) -> None:
+        self.__trace = trace
+        self.__time_scale = time_scale
+        self.__storm_factor = storm_factor
+        self.__started_at = time.monotonic()
+
+    def get_conditions(self) -> WeatherConditions:
+        conditions: WeatherConditions = self.__trace.get_conditions(seconds=(time.monotonic() - self.__started_at) * self.__time_scale)
+        return replace(conditions, wind_speed=conditions.wind_speed * self.__storm_factor, rain_rate=conditions.rain_rate * self.__storm_factor)
+
+
+def _to_raw_data(adc_p: int, adc_t: int, adc_h: int) -> bytes:
+    # Pressure and temperature are 20 bits values left aligned in three registers, humidity takes two
+    return bytes(
+        [
+            (adc_p >> 12) & 0xFF,
+            (adc_p >> 4) & 0xFF,
+            (adc_p << 4) & 0xF0,
+            (adc_t >> 12) & 0xFF,
+            (adc_t >> 4) & 0xFF,
+            (adc_t << 4) & 0xF0,
+            (adc_h >> 8) & 0xFF,
+            adc_h & 0xFF,
+        ]
+    )
+
+
+def _find_adc_value(target: float, maximum: int, compensated: Callable[[int], Optional[float]]) -> int:
+    # The compensation is monotonic, the raw value giving the target is found by bisection instead of inverting the formulas
+    low: int = 0
+    high: int = maximum
+    increasing: bool = (compensated(maximum) or 0) > (compensated(0) or 0)
+
+    while high - low > 1:
+        middle: int = (low + high) // 2
+        if ((compensated(middle) or 0) < target) == increasing:
+            low = middle
+        else:
+            high = middle
+
+    return low
+
+
+def _get_raw_data(conditions: WeatherConditions, temperature: bool, pressure: bool, humidity: bool) -> bytes:
+    def compensate_adc(adc_p: int, adc_t: int, adc_h: int) -> Bme280Reading:
+        return compensate(raw_data=_to_raw_data(adc_p=adc_p, adc_t=adc_t, adc_h=adc_h), calibration=_CALIBRATION)
+
+    if not temperature:
+        return _to_raw_data(adc_p=_SKIPPED_TEMPERATURE_OR_PRESSURE, adc_t=_SKIPPED_TEMPERATURE_OR_PRESSURE, adc_h=_SKIPPED_HUMIDITY)
+
+    adc_t: int = _find_adc_value(
+        target=conditions.temperature,
+        maximum=0xFFFFF,
+        compensated=lambda adc: compensate_adc(adc_p=_SKIPPED_TEMPERATURE_OR_PRESSURE, adc_t=adc, adc_h=_SKIPPED_HUMIDITY).temperature,
+    )
+    adc_p: int = _SKIPPED_TEMPERATURE_OR_PRESSURE
+    adc_h: int = _SKIPPED_HUMIDITY
+
+    if pressure:
+        adc_p = _find_adc_value(
+            target=conditions.pressure,
+            maximum=0xFFFFF,
+            compensated=lambda adc: compensate_adc(adc_p=adc, adc_t=adc_t, adc_h=_SKIPPED_HUMIDITY).pressure,
+        )
+
+    if humidity:
+        adc_h = _find_adc_value(
+            target=conditions.humidity,
+            maximum=0xFFFF - 1,
+            compensated=lambda adc: compensate_adc(adc_p=_SKIPPED_TEMPERATURE_OR_PRESSURE, adc_t=adc_t, adc_h=adc).humidity,
+        )
+
+    return _to_raw_data(adc_p=adc_p, adc_t=adc_t, adc_h=adc_h)
+
+
+class SimulatedSMBus(object):
+    # Register map of a BME280, it answers the same transfers as the chip so the driver runs unchanged
+    __slots__ = ["__address", "__clock", "__registers", "__lock"]
+
+    def __init__(self, address: int, clock: WeatherClock) -> None:
+        self.__address = address
+        self.__clock = clock
+        self.__registers = bytearray(256)
+        self.__lock = threading.Lock()
+
+        tp_block: bytes = struct.pack(
+            "<HhhHhhhhhhhhBB",
+            _CALIBRATION.dig_t1,
+            _CALIBRATION.dig_t2,
+            _CALIBRATION.dig_t3,
+            _CALIBRATION.dig_p1,
+            _CALIBRATION.dig_p2,
+            _CALIBRATION.dig_p3,
+            _CALIBRATION.dig_p4,
+            _CALIBRATION.dig_p5,
+            _CALIBRATION.dig_p6,
+            _CALIBRATION.dig_p7,
+            _CALIBRATION.dig_p8,
+            _CALIBRATION.dig_p9,
+            0,
+            _CALIBRATION.dig_h1,
+        )
+        h_block: bytes = struct.pack(
+            "<hBbBbb",
+            _CALIBRATION.dig_h2,
+            _CALIBRATION.dig_h3,
+            _CALIBRATION.dig_h4 >> 4,
+            (_CALIBRATION.dig_h4 & 0x0F) | ((_CALIBRATION.dig_h5 & 0x0F) << 4),
+            _CALIBRATION.dig_h5 >> 4,
+            _CALIBRATION.dig_h6,
+        )
+        self.__registers[_CHIP_ID_REGISTER] = _CHIP_ID
+        self.__registers[_CALIBRATION_TP_REGISTER : _CALIBRATION_TP_REGISTER + len(tp_block)] = tp_block
+        self.__registers[_CALIBRATION_H_REGISTER : _CALIBRATION_H_REGISTER + len(h_block)] = h_block
+
+    def read_byte_data(self, i2c_addr: int, register: int) -> int:
+        return self.read_i2c_block_data(i2c_addr, register, 1)[0]
+
+    def read_i2c_block_data(self, i2c_addr: int, register: int, length: int) -> List[int]:
+        self.__check_address(i2c_addr=i2c_addr)
+
+        with self.__lock:
+            if register == _DATA_REGISTER and self.__registers[_CTRL_MEAS_REGISTER] & _NORMAL_MODE == _NORMAL_MODE:
+                # The chip measures continuously in normal mode, the last conditions are always available
+                self.__measure()
+
+            return list(self.__registers[register : register + length])
+
+    def write_byte_data(self, i2c_addr: int, register: int, value: int) -> None:
+        self.__check_address(i2c_addr=i2c_addr)
+
+        with self.__lock:
+            self.__registers[register] = value
+
+            if register == _CTRL_MEAS_REGISTER and value & _NORMAL_MODE == _FORCED_MODE:
+                # A forced measurement finishes straight away and the chip goes back to sleep
+                self.__measure()
+                self.__registers[_CTRL_MEAS_REGISTER] = value & ~_NORMAL_MODE
+
+    def close(self) -> None:
+        pass
+
+    def __check_address(self, i2c_addr: int) -> None:
+        if i2c_addr != self.__address:
+            raise OSError(errno.EREMOTEIO, f"No device at {hex(i2c_addr)}")
+
+    def __measure(self) -> None:
+        ctrl_meas: int = self.__registers[_CTRL_MEAS_REGISTER]
+        raw_data: bytes = _get_raw_data(
+            conditions=self.__clock.get_conditions(),
+            temperature=ctrl_meas >> 5 != 0,
+            pressure=(ctrl_meas >> 2) & 0b111 != 0,
+            humidity=self.__registers[_CTRL_HUM_REGISTER] & 0b111 != 0,
+        )
+        self.__registers[_DATA_REGISTER : _DATA_REGISTER + len(raw_data)] = raw_data
+
+
+class SimulatedW1ThermSensor(object):
+    __slots__ = ["__id", "__clock", "__offset", "__resolution"]
+
+    def __init__(self, sensor_id: str, clock: WeatherClock, offset: float) -> None:
+        self.__id = sensor_id
+        self.__clock = clock
+        # Deeper probes are colder
+        self.__offset = offset
+        self.__resolution = _W1_DEFAULT_RESOLUTION
+
+    @property
+    def id(self) -> str:
+        return self.__id
+
+    def set_resolution(self, resolution: int, persist: bool = False) -> None:
+        if resolution not in _W1_CONVERSION_SECONDS:
+            raise ValueError(f"Invalid resolution {resolution}, valid ones are {', '.join(map(str, _W1_CONVERSION_SECONDS))}")
+
+        self.__resolution = resolution
+
+    async def get_temperature(self) -> float:
+        await asyncio.sleep(_W1_CONVERSION_SECONDS[self.__resolution])
+
+        # The probe reports multiples of its resolution, 0.0625 ºC with 12 bits
+        step: float = 0.5 / 2 ** (self.__resolution - 9)
+        return round(number=(self.__clock.get_conditions().ground_temperature + self.__offset) / step) * step
+
+
+class SimulatedMcp3008(object):
+    __slots__ = ["__clock", "__random"]
+
+    __NOISE_VOLTS: float = 0.02
+
+    def __init__(self, clock: WeatherClock, seed: int) -> None:
+        self.__clock = clock
+        self.__random = random.Random(seed)
+
+    @property
+    def value(self) -> float:
+        # The voltage of the vane divider for the direction of the wind, with some noise that never crosses to another direction
+        direction: WindDirection = WindDirection.from_bearing(bearing=self.__clock.get_conditions().bearing)
+        voltage: float = next(voltage for voltage, item_direction in Vane.VANE_ANGLES_AND_DIRECTIONS_TABLE if item_direction is direction)
+
+        return (voltage + self.__random.uniform(-self.__NOISE_VOLTS, self.__NOISE_VOLTS)) / Vane.VOLTAGE_IN
+
+    def close(self) -> None:
+        pass
+
+
+class SimulatedButton(object):
+    # Fires when_pressed from its own thread as gpiozero does, at the pulse rate given by the trace
+    __slots__ = ["when_pressed", "__get_pulse_rate", "__maximum_pulse_rate", "__stopped", "__thread", "__random"]
+
+    __TICK_SECONDS: float = 0.01
+
+    def __init__(self, pin: int, get_pulse_rate: Callable[[], float], bounce_time: Optional[float], seed: int) -> None:
+        self.when_pressed: Optional[Callable[[], None]] = None
+        self.__get_pulse_rate = get_pulse_rate
+        # Pulses closer than the debounce time are ignored by gpiozero
+        self.__maximum_pulse_rate: float = 1 / bounce_time if bounce_time else math.inf
+        self.__random = random.Random(seed)
+        self.__stopped = threading.Event()
+        self.__thread = threading.Thread(target=self.__generate_edges, name=f"simulated-gpio-{pin}", daemon=True)
+        self.__thread.start()
+
+    def __generate_edges(self) -> None:
+        pending_pulses: float = 0.0
+        last_tick: float = time.monotonic()
+
+        # Every pulse due in a tick is fired in a burst, so rates far beyond the tick frequency can be generated
+        while not self.__stopped.wait(timeout=self.__TICK_SECONDS):
+            now: float = time.monotonic()
+            pulse_rate: float = min(self.__get_pulse_rate(), self.__maximum_pulse_rate)
+            pending_pulses += pulse_rate * (now - last_tick) * self.__random.uniform(0.9, 1.1)
+            last_tick = now
+
+            pulses: int = int(pending_pulses)
+            pending_pulses -= pulses
+
+            when_pressed: Optional[Callable[[], None]] = self.when_pressed
+            if when_pressed is not None:
+                for _ in range(pulses):
+                    when_pressed()
+
+    def close(self) -> None:
+        self.__stopped.set()
+        self.__thread.join()
+
+
+class SimulatedHardware(Hardware):
+    __slots__ = ["__clock", "__seed", "__logger"]
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.__logger = logging.getLogger(name=self.__class__.__name__)
+
+        trace: WeatherTrace = (
+            RecordedWeatherTrace(path=global_config.simulator.trace_path)
+            if global_config.simulator.trace_path
+            else SyntheticWeatherTrace(seed=global_config.simulator.seed)
+        )
+        self.__clock = WeatherClock(trace=trace, time_scale=global_config.simulator.time_scale, storm_factor=global_config.simulator.storm_factor)
+        self.__seed = global_config.simulator.seed
+
+        self.__logger.info(
+            msg=f"Simulating the hardware with the {type(trace).__name__} at {global_config.simulator.time_scale}x"
+            f" and a storm factor of {global_config.simulator.storm_factor}"
+        )
+
+    @property
+    def clock(self) -> WeatherClock:
+        return self.__clock
+
+    def open_i2c_bus(self, port: int) -> SimulatedSMBus:
+        return self._add_device(device=SimulatedSMBus(address=int(global_config.device.bme280_sensor_address, 16), clock=self.__clock))
+
+    def get_w1_sensors(self) -> List[SimulatedW1ThermSensor]:
+        sensor_ids: List[str] = [sensor_id.rpartition("-")[2] for sensor_id in global_config.device.ground_temperature_sensor_ids] or [
+            f"{index:012x}" for index in range(1, global_config.simulator.ground_probes + 1)
+        ]
+
+        return [SimulatedW1ThermSensor(sensor_id=sensor_id, clock=self.__clock, offset=-0.5 * index) for index, sensor_id in enumerate(sensor_ids)]
+
+    def create_button(self, pin: int, bounce_time: Optional[float]) -> SimulatedButton:
+        if pin == global_config.device.anemometer_port:
+            get_pulse_rate: Callable[[], float] = self.__get_anemometer_pulse_rate
+        elif pin == global_config.device.rain_gauge_port:
+            get_pulse_rate: Callable[[], float] = self.__get_rain_gauge_pulse_rate
+        else:
+            self.__logger.warning(msg=f"Nothing is simulated on the pin {pin}, it will not receive any pulse")
+            get_pulse_rate: Callable[[], float] = self.__get_no_pulse_rate
+
+        return self._add_device(device=SimulatedButton(pin=pin, get_pulse_rate=get_pulse_rate, bounce_time=bounce_time, seed=self.__seed + pin))
+
+    def __get_anemometer_pulse_rate(self) -> float:
+        return self.__clock.get_conditions().wind_speed / Anemometer.SPEED_PER_PULSE_RATE
+
+    def __get_rain_gauge_pulse_rate(self) -> float:
+        # Bucket tips per second from mm/h
+        return self.__clock.get_conditions().rain_rate / RainfallService.BUCKET_SIZE_IN_MM / 3600
+
+    @staticmethod
+    def __get_no_pulse_rate() -> float:
+        return 0.0
+
+    def create_mcp3008(self, channel: int) -> SimulatedMcp3008:
+        return self._add_device(device=SimulatedMcp3008(clock=self.__clock, seed=self.__seed + channel))